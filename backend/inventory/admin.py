@@ -1,3 +1,32 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
-# Register your models here.
+from .models import Organization, Unit, User
+
+
+@admin.register(Organization)
+class OrganizationAdmin(admin.ModelAdmin):
+    list_display = ('name', 'licence_number', 'is_active', 'created_at')
+    search_fields = ('name', 'licence_number')
+
+
+@admin.register(Unit)
+class UnitAdmin(admin.ModelAdmin):
+    list_display = (
+        'cultivar_name', 'unit_type', 'status', 'current_owner', 'parent_unit',
+        'created_at'
+    )
+    list_filter = ('status', 'unit_type', 'lab_test_status')
+    list_select_related = ('current_owner', 'parent_unit')
+    raw_id_fields = ('current_owner', 'parent_unit')
+    search_fields = ('cultivar_name',)
+
+
+@admin.register(User)
+class UserAdmin(BaseUserAdmin):
+    list_display = ('username', 'organization', 'role', 'is_staff')
+    list_select_related = ('organization',)
+    fieldsets = (
+        *BaseUserAdmin.fieldsets,
+        ('Organization', {'fields': ('organization', 'role')}),
+    )
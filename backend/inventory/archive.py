@@ -0,0 +1,90 @@
+"""
+This script moves closed units from the Unit table into the archive
+"""
+import functools
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .caching import bump_version, unit_scope
+from .ledger import record_events
+from .models import ArchivedUnit, CustodyEventType, Unit, UnitStatus
+from .routers import pin_to_primary
+
+ARCHIVABLE_STATUSES = (UnitStatus.ARCHIVED, UnitStatus.DISPOSED)
+
+
+def archivable_units(cutoff):
+    """ Closed units last written before the cutoff """
+    return Unit.objects.filter(
+        status__in=ARCHIVABLE_STATUSES, updated_at__lt=cutoff
+    )
+
+
+def archive_batch(cutoff, batch_size: int) -> int:
+    """ Moves up to `batch_size` archivable units, oldest first.
+
+    The copy, the delete and the ARCHIVED ledger events commit together,
+    so an interrupted run leaves each unit in exactly one table and the
+    next run carries on with what is left. Returns the units moved.
+    """
+    fields = Unit._meta.concrete_fields
+    archive_names = {
+        field.column: field.attname for field in ArchivedUnit._meta.concrete_fields
+    }
+    with transaction.atomic():
+        rows = list(
+            archivable_units(cutoff).select_for_update()
+            .order_by('updated_at', 'id')
+            .values(*[field.attname for field in fields])[:batch_size]
+        )
+        if not rows:
+            return 0
+        now = timezone.now()
+        ArchivedUnit.objects.bulk_create([
+            ArchivedUnit(archived_at=now, **{
+                archive_names[field.column]: row[field.attname] for field in fields
+            })
+            for row in rows
+        ])
+        delete_units([row['id'] for row in rows])
+
+        owners = {}
+        for row in rows:
+            owners.setdefault(row['current_owner_id'], []).append(row['id'])
+        # Chains are locked in a fixed order, as transfers do
+        for organization_id, unit_ids in sorted(owners.items()):
+            record_events(organization_id, [
+                {'unit_id': unit_id, 'event_type': CustodyEventType.ARCHIVED}
+                for unit_id in unit_ids
+            ])
+        # No post_delete signals fire for the plain DELETE, so the cached
+        # unit reads of every owner are invalidated here instead
+        for organization_id in owners:
+            transaction.on_commit(functools.partial(invalidate_units, organization_id))
+    return len(rows)
+
+
+def delete_units(unit_ids: list) -> None:
+    """ Deletes units with a plain DELETE ... WHERE id IN (...)
+
+    QuerySet.delete() would run the collector, which nulls the children's
+    parent_unit and so cuts archived parents out of their lineage. The
+    copy in the archive keeps the ids, so the references stay resolvable.
+    Deliberately skips the delete signals; the caller invalidates caches.
+    """
+    connection = connections[Unit.objects.db]
+    table = connection.ops.quote_name(Unit._meta.db_table)
+    pk = Unit._meta.pk
+    params = [pk.get_db_prep_value(unit_id, connection) for unit_id in unit_ids]
+    placeholders = ', '.join(['%s'] * len(params))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} WHERE {connection.ops.quote_name(pk.column)} '
+            f'IN ({placeholders})', params
+        )
+
+
+def invalidate_units(organization_id) -> None:
+    bump_version(unit_scope(organization_id))
+    pin_to_primary(organization_id)
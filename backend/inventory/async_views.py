@@ -0,0 +1,156 @@
+"""
+This script serves the read-only endpoints natively under ASGI
+"""
+import base64
+import binascii
+import functools
+import uuid
+
+from django.db.models import Q
+from django.http import JsonResponse
+from django.utils.dateparse import parse_datetime
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.utils.urls import replace_query_param
+
+from .authentication import OrganizationJWTAuthentication
+from .models import Organization, Unit
+from .pagination import UnitCursorPagination
+from .routers import replica_reads
+from .serializers import OrganizationSerializer, UnitSerializer
+from .views import UnitViewSet
+
+
+def async_api_view(handler):
+    """ Authenticates a GET request with JWT and renders API errors.
+
+    A trimmed down async take on DRF's APIView: the token is validated
+    in-process and the user is loaded with the async ORM, so the request
+    never holds a thread while it waits on the database or the client.
+    """
+    @functools.wraps(handler)
+    async def view(request, *args, **kwargs):
+        if request.method != 'GET':
+            return JsonResponse(
+                {'detail': f'Method "{request.method}" not allowed.'},
+                status=405
+            )
+        api_request = Request(request)
+        try:
+            result = await OrganizationJWTAuthentication().aauthenticate(
+                api_request
+            )
+            if result is None:
+                raise exceptions.NotAuthenticated()
+            api_request.user, api_request.auth = result
+            with replica_reads(api_request.user.organization_id):
+                return await handler(api_request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            detail = exc.detail
+            if not isinstance(detail, dict | list):
+                detail = {'detail': detail}
+            return JsonResponse(detail, status=exc.status_code, safe=False)
+
+    return view
+
+
+def encode_cursor(unit: Unit) -> str:
+    position = f'{unit.created_at.isoformat()}|{unit.id}'
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, unit_id = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        )
+        created_at = parse_datetime(created_at)
+        unit_id = uuid.UUID(unit_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise exceptions.NotFound("Invalid cursor") from exc
+    if created_at is None or created_at.tzinfo is None:
+        raise exceptions.NotFound("Invalid cursor")
+    return created_at, unit_id
+
+
+def get_page_size(request) -> int:
+    try:
+        page_size = int(request.query_params.get(
+            UnitCursorPagination.page_size_query_param,
+            UnitCursorPagination.page_size
+        ))
+    except ValueError:
+        page_size = UnitCursorPagination.page_size
+    return max(1, min(page_size, UnitCursorPagination.max_page_size))
+
+
+@async_api_view
+async def unit_list(request):
+    """ Lists the organization's Units, seeking on (created_at, id) """
+    organization_id = request.user.organization_id
+    if not organization_id:
+        return JsonResponse({'next': None, 'results': []})
+
+    view = UnitViewSet(request=request)
+    queryset = Unit.objects.for_organization(organization_id)
+    for backend in view.filter_backends:
+        queryset = backend().filter_queryset(request, queryset, view)
+
+    if cursor := request.query_params.get('cursor'):
+        created_at, unit_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=unit_id)
+        )
+
+    page_size = get_page_size(request)
+    units = [
+        unit async for unit in
+        queryset.order_by('-created_at', '-id')[:page_size + 1].aiterator()
+    ]
+    next_url = None
+    if len(units) > page_size:
+        units = units[:page_size]
+        next_url = replace_query_param(
+            request.build_absolute_uri(), 'cursor', encode_cursor(units[-1])
+        )
+
+    serializer = UnitSerializer(units, many=True, context={'request': request})
+    return JsonResponse({'next': next_url, 'results': serializer.data})
+
+
+@async_api_view
+async def unit_detail(request, pk):
+    """ Returns one of the organization's Units """
+    try:
+        unit = await Unit.objects.for_organization(
+            request.user.organization_id
+        ).aget(pk=pk)
+    except Unit.DoesNotExist as exc:
+        raise exceptions.NotFound() from exc
+    serializer = UnitSerializer(unit, context={'request': request})
+    return JsonResponse(serializer.data)
+
+
+@async_api_view
+async def organization_list(request):
+    """ Lists the user's Organization """
+    organizations = [
+        organization async for organization in
+        Organization.objects.for_organization(
+            request.user.organization_id
+        ).aiterator()
+    ]
+    serializer = OrganizationSerializer(organizations, many=True)
+    return JsonResponse(serializer.data, safe=False)
+
+
+@async_api_view
+async def organization_detail(request, pk):
+    """ Returns the user's Organization """
+    try:
+        organization = await Organization.objects.for_organization(
+            request.user.organization_id
+        ).aget(pk=pk)
+    except Organization.DoesNotExist as exc:
+        raise exceptions.NotFound() from exc
+    return JsonResponse(OrganizationSerializer(organization).data)
@@ -0,0 +1,200 @@
+"""
+This script defines how API requests are authenticated
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import UTC, datetime
+from functools import cached_property
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .instrumentation import timed
+from .models import RevokedToken
+
+ORGANIZATION_CLAIM = 'organization_id'
+ROLE_CLAIM = 'role'
+
+
+def add_organization_claims(token, user):
+    """ Embeds what views scope by into the token """
+    organization_id = user.organization_id
+    token[ORGANIZATION_CLAIM] = str(organization_id) if organization_id else None
+    token[ROLE_CLAIM] = user.role
+    return token
+
+
+class OrganizationTokenUser(TokenUser):
+    """ Stateless user built from the token's organization and role claims """
+
+    @cached_property
+    def organization_id(self):
+        value = self.token.get(ORGANIZATION_CLAIM)
+        return uuid.UUID(value) if value else None
+
+    @cached_property
+    def role(self):
+        return self.token.get(ROLE_CLAIM)
+
+
+class RevocationCache:
+    """ LRU cache of whether token ids are revoked.
+
+    Answers are kept for TOKEN_REVOCATION_CACHE_TTL seconds, so a token
+    revoked on another process is refused within that window while
+    repeated requests with the same token skip the lookup.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, jti):
+        with self.lock:
+            entry = self.entries.get(jti)
+            if entry is None:
+                return None
+            revoked, expires = entry
+            if expires <= time.monotonic():
+                del self.entries[jti]
+                return None
+            self.entries.move_to_end(jti)
+            return revoked
+
+    def set(self, jti, revoked):
+        expires = time.monotonic() + settings.TOKEN_REVOCATION_CACHE_TTL
+        with self.lock:
+            self.entries[jti] = (revoked, expires)
+            self.entries.move_to_end(jti)
+            while len(self.entries) > settings.TOKEN_REVOCATION_CACHE_SIZE:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def is_revoked(self, jti):
+        revoked = self.get(jti)
+        if revoked is None:
+            revoked = RevokedToken.objects.filter(jti=jti).exists()
+            self.set(jti, revoked)
+        return revoked
+
+    async def ais_revoked(self, jti):
+        revoked = self.get(jti)
+        if revoked is None:
+            revoked = await RevokedToken.objects.filter(jti=jti).aexists()
+            self.set(jti, revoked)
+        return revoked
+
+
+revoked_tokens = RevocationCache()
+
+
+def revoke_token(token):
+    """ Stops a token from being accepted, effective at once on this process """
+    jti = token[api_settings.JTI_CLAIM]
+    RevokedToken.objects.filter(expires_at__lt=timezone.now()).delete()
+    RevokedToken.objects.get_or_create(
+        jti=jti,
+        defaults={'expires_at': datetime.fromtimestamp(token['exp'], UTC)}
+    )
+    revoked_tokens.set(jti, True)
+
+
+class OrganizationJWTAuthentication(JWTAuthentication):
+    """ JWT authentication that scopes requests by the token's organization.
+
+    With INVENTORY_STATELESS_AUTH the user is built from the token claims
+    and no user row is read; revocation is checked through
+    `revoked_tokens`. Tokens issued without the claims, or stateless mode
+    turned off, load the user and organization together instead.
+    """
+
+    def authenticate(self, request):
+        with timed('auth'):
+            return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if revoked_tokens.is_revoked(validated_token[api_settings.JTI_CLAIM]):
+            raise AuthenticationFailed(_("Token is revoked"), code="token_revoked")
+        if self.is_stateless(validated_token):
+            return OrganizationTokenUser(validated_token)
+        try:
+            user = self.user_model.objects.select_related('organization').get(
+                **self.get_user_lookup(validated_token)
+            )
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed(
+                _("User not found"), code="user_not_found"
+            ) from e
+        return self.check_user(user, validated_token)
+
+    async def aget_user(self, validated_token):
+        """ Async counterpart of get_user for async views """
+        jti = validated_token[api_settings.JTI_CLAIM]
+        if await revoked_tokens.ais_revoked(jti):
+            raise AuthenticationFailed(_("Token is revoked"), code="token_revoked")
+        if self.is_stateless(validated_token):
+            return OrganizationTokenUser(validated_token)
+        try:
+            user = await self.user_model.objects.select_related(
+                'organization'
+            ).aget(**self.get_user_lookup(validated_token))
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed(
+                _("User not found"), code="user_not_found"
+            ) from e
+        return self.check_user(user, validated_token)
+
+    async def aauthenticate(self, request):
+        """ Async counterpart of authenticate; token checks need no I/O """
+        with timed('auth'):
+            return await self._aauthenticate(request)
+
+    async def _aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    @staticmethod
+    def is_stateless(validated_token):
+        return (
+            settings.INVENTORY_STATELESS_AUTH
+            and ORGANIZATION_CLAIM in validated_token
+        )
+
+    def get_user_lookup(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+        return {api_settings.USER_ID_FIELD: user_id}
+
+    def check_user(self, user, validated_token):
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."), code="password_changed"
+            )
+
+        return user
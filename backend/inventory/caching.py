@@ -0,0 +1,107 @@
+"""
+This script caches read responses per organization
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_KEY = 'inventory:version:{scope}'
+RESPONSE_KEY = 'inventory:response:v2:{digest}'
+
+
+def get_version(scope: str) -> int:
+    """ Returns the current cache generation for a scope.
+
+    Generations start from the clock rather than 1 so an evicted counter
+    can never hand out a version (and ETag) that was already used.
+    """
+    key = VERSION_KEY.format(scope=scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(scope: str) -> None:
+    """ Invalidates every cached response of a scope """
+    key = VERSION_KEY.format(scope=scope)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def unit_scope(organization_id) -> str:
+    """ Returns the cache scope of an organization's units """
+    return f'units:{organization_id}'
+
+
+def organization_scope(organization_id) -> str:
+    """ Returns the cache scope of what an organization sees of itself """
+    return f'organizations:{organization_id}'
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """ Whether an If-None-Match header lists `etag`.
+
+    The header is a comma separated list compared tag by tag, ignoring
+    the W/ weak prefix; `*` matches any representation.
+    """
+    tags = {tag.strip().removeprefix('W/') for tag in header.split(',')}
+    return '*' in tags or etag.removeprefix('W/') in tags
+
+
+class CachedReadMixin:
+    """ Serves list and retrieve from the cache, with ETag validation.
+
+    Entries are keyed by the viewset's cache scope, the scope's version and
+    the full request path, so any write that bumps the version makes every
+    earlier entry stale at once. The ETag defaults to the same digest;
+    viewsets may derive it from the response instead with `get_etag`.
+    """
+
+    def get_cache_scope(self) -> str | None:
+        raise NotImplementedError
+
+    def get_etag(self, response, digest: str) -> str:
+        return f'"{digest}"'
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        scope = self.get_cache_scope()
+        if scope is None:
+            return handler(request, *args, **kwargs)
+
+        version = get_version(scope)
+        digest = hashlib.md5(
+            f'{scope}:{version}:{request.get_full_path()}'.encode(),
+            usedforsecurity=False
+        ).hexdigest()
+
+        key = RESPONSE_KEY.format(digest=digest)
+        entry = cache.get(key)
+        if entry is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            etag = self.get_etag(response, digest)
+            cache.set(key, (response.data, etag), settings.INVENTORY_CACHE_TIMEOUT)
+        else:
+            data, etag = entry
+            response = Response(data)
+        if etag_matches(request.headers.get('If-None-Match', ''), etag):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag}
+            )
+        response['ETag'] = etag
+        return response
@@ -0,0 +1,48 @@
+"""
+This script streams inventory exports without building them in memory
+"""
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """ File-like object whose write() hands the line back to csv.writer """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def _rows(queryset, fields):
+    return queryset.values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def stream_csv(queryset, fields):
+    """ Yields a header line then one CSV line per row """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in _rows(queryset, fields):
+        yield writer.writerow([_csv_value(value) for value in row])
+
+
+def stream_ndjson(queryset, fields):
+    """ Yields one JSON object per row, newline delimited """
+    encoder = DjangoJSONEncoder()
+    for row in _rows(queryset, fields):
+        yield encoder.encode(dict(zip(fields, row, strict=True))) + '\n'
+
+
+EXPORTERS = {
+    'csv': (stream_csv, 'text/csv'),
+    'ndjson': (stream_ndjson, 'application/x-ndjson'),
+}
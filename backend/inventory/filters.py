@@ -0,0 +1,145 @@
+"""
+This script defines the query-parameter filters used by the API
+"""
+import math
+
+from django.db.models import F, Q, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+from django.utils.dateparse import parse_date
+from rest_framework import exceptions
+from rest_framework.filters import BaseFilterBackend
+
+from .geo import EARTH_RADIUS_KM, covering_cells, parse_coordinates, radius_box
+from .models import LabTestStatus, QualityGrade, UnitStatus, UnitType
+
+
+class UnitFilterBackend(BaseFilterBackend):
+    """ Filters Units on their choice fields, harvest date range and location.
+
+    Choice parameters accept a comma separated list, e.g.
+    `?status=ACTIVE,TRANSIT&date_harvested_after=2025-01-01`. Locations
+    are matched with `?bbox=south,west,north,east` or
+    `?near=lat,lon&radius_km=5`.
+    """
+    choice_filters = {  # noqa: RUF012
+        'status': UnitStatus,
+        'lab_test_status': LabTestStatus,
+        'unit_type': UnitType,
+        'quality_grade': QualityGrade,
+    }
+    date_filters = {  # noqa: RUF012
+        'date_harvested_after': 'date_harvested__gte',
+        'date_harvested_before': 'date_harvested__lte',
+    }
+
+    location_filters = ('bbox', 'near')
+
+    @classmethod
+    def is_filtering(cls, params):
+        """ Whether `params` sets any parameter this backend filters on """
+        return any(
+            params.get(name)
+            for name in (*cls.choice_filters, *cls.date_filters, *cls.location_filters)
+        )
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        for param, choices in self.choice_filters.items():
+            if param not in params:
+                continue
+            values = [v for v in params[param].split(',') if v]
+            invalid = [v for v in values if v not in choices.values]
+            if invalid:
+                raise exceptions.ValidationError(
+                    {param: f"Invalid choice(s): {', '.join(invalid)}."}
+                )
+            if len(values) == 1:
+                queryset = queryset.filter(**{param: values[0]})
+            elif values:
+                queryset = queryset.filter(**{f'{param}__in': values})
+
+        for param, lookup in self.date_filters.items():
+            if param not in params:
+                continue
+            try:
+                value = parse_date(params[param])
+            except ValueError:
+                value = None
+            if value is None:
+                raise exceptions.ValidationError(
+                    {param: "Date must be in YYYY-MM-DD format."}
+                )
+            queryset = queryset.filter(**{lookup: value})
+
+        if 'bbox' in params:
+            queryset = self.filter_box(queryset, *self.parse_bbox(params['bbox']))
+        if 'near' in params:
+            queryset = self.filter_radius(queryset, params)
+        return queryset
+
+    @staticmethod
+    def parse_bbox(value):
+        try:
+            south, west, north, east = (float(v) for v in value.split(','))
+        except ValueError:
+            south = None
+        if (
+            south is None
+            or not -90 <= south <= north <= 90
+            or not (-180 <= west <= 180 and -180 <= east <= 180)
+        ):
+            raise exceptions.ValidationError(
+                {'bbox': "Expected south,west,north,east in degrees."}
+            )
+        return south, west, north, east
+
+    @staticmethod
+    def filter_box(queryset, south, west, north, east):
+        """ Matches units inside the box, scanning only the geohash cells
+        that cover it. West > east crosses the antimeridian.
+        """
+        boxes = [(south, west, north, east)]
+        if west > east:
+            boxes = [(south, west, north, 180.0), (south, -180.0, north, east)]
+
+        area, cover, covered = Q(), Q(), True
+        for box in boxes:
+            area |= Q(
+                latitude__gte=box[0], latitude__lte=box[2],
+                longitude__gte=box[1], longitude__lte=box[3]
+            )
+            cells = covering_cells(*box)
+            covered = covered and bool(cells)
+            for cell in cells:
+                # A prefix match written as a range so it uses the index
+                cover |= Q(geohash__gte=cell, geohash__lt=cell + '~')
+        if covered:
+            queryset = queryset.filter(cover)
+        return queryset.filter(area)
+
+    def filter_radius(self, queryset, params):
+        center = parse_coordinates(params['near'])
+        try:
+            radius = float(params.get('radius_km', ''))
+        except ValueError:
+            radius = -1
+        if center is None:
+            raise exceptions.ValidationError(
+                {'near': "Expected lat,lon in degrees."}
+            )
+        if not 0 < radius <= 20000:
+            raise exceptions.ValidationError(
+                {'radius_km': "Must be a distance between 0 and 20000 km."}
+            )
+
+        latitude, longitude = center
+        queryset = self.filter_box(queryset, *radius_box(latitude, longitude, radius))
+        # Haversine distance, only computed for rows inside the box
+        half_chord = Least(
+            Power(Sin(Radians(F('latitude') - latitude) / 2), 2)
+            + Cos(Radians(F('latitude'))) * math.cos(math.radians(latitude))
+            * Power(Sin(Radians(F('longitude') - longitude) / 2), 2),
+            Value(1.0),
+        )
+        distance = 2 * EARTH_RADIUS_KM * ASin(Sqrt(half_chord))
+        return queryset.alias(distance_km=distance).filter(distance_km__lte=radius)
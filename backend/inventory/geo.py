@@ -0,0 +1,99 @@
+"""
+This script parses unit coordinates and maps areas onto geohash cells
+"""
+import math
+import re
+
+GEOHASH_PRECISION = 9
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+_COORDINATES = re.compile(
+    r'^\s*\(?\s*(-?\d+(?:\.\d+)?)\s*[,;\s]\s*(-?\d+(?:\.\d+)?)\s*\)?\s*$'
+)
+
+
+def parse_coordinates(text: str | None) -> tuple[float, float] | None:
+    """ Reads "34.0552, -110.5523" style text; None when it isn't a point """
+    match = _COORDINATES.match(text or '')
+    if match is None:
+        return None
+    latitude, longitude = float(match[1]), float(match[2])
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return latitude, longitude
+
+
+def encode_geohash(latitude: float, longitude: float,
+                   precision: int = GEOHASH_PRECISION) -> str:
+    """ Interleaves longitude and latitude bisections into base32 cells """
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        span, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (span[0] + span[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            span[0] = middle
+        else:
+            span[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision: int) -> tuple[float, float]:
+    """ Returns the (latitude, longitude) degrees covered by one cell """
+    bits = 5 * precision
+    return 180 / 2 ** (bits // 2), 360 / 2 ** ((bits + 1) // 2)
+
+
+def covering_cells(south: float, west: float, north: float, east: float,
+                   max_cells: int = 16) -> list[str]:
+    """ Returns the geohash prefixes covering a box, at most `max_cells`.
+
+    The finest precision that stays within the limit is used, so each
+    prefix becomes one range scan on the geohash index. An empty list
+    means the box is too large to be worth covering.
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        rows = math.floor(north / height) - math.floor(south / height) + 1
+        columns = math.floor(east / width) - math.floor(west / width) + 1
+        if rows * columns <= max_cells:
+            break
+    else:
+        return []
+
+    cells = set()
+    for row in range(rows):
+        latitude = min((math.floor(south / height) + row + 0.5) * height, 90)
+        for column in range(columns):
+            longitude = (math.floor(west / width) + column + 0.5) * width
+            cells.add(encode_geohash(latitude, min(longitude, 180), precision))
+    return sorted(cells)
+
+
+def radius_box(latitude: float, longitude: float, radius_km: float):
+    """ Returns the (south, west, north, east) box around a circle.
+
+    The longitude span is widened to the whole globe near the poles, and
+    west > east when the box crosses the antimeridian.
+    """
+    delta_lat = radius_km / KM_PER_DEGREE
+    south, north = max(latitude - delta_lat, -90), min(latitude + delta_lat, 90)
+    cos_lat = math.cos(math.radians(max(abs(south), abs(north))))
+    if cos_lat <= 0 or radius_km / (KM_PER_DEGREE * cos_lat) >= 180:
+        return south, -180.0, north, 180.0
+    delta_lon = radius_km / (KM_PER_DEGREE * cos_lat)
+    west, east = longitude - delta_lon, longitude + delta_lon
+    if west < -180:
+        west += 360
+    if east > 180:
+        east -= 360
+    return south, west, north, east
@@ -0,0 +1,219 @@
+"""
+This script records per-request performance metrics for the API
+"""
+import bisect
+import contextlib
+import contextvars
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+
+logger = logging.getLogger('inventory.slow_queries')
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+_current = contextvars.ContextVar('inventory_request_metrics', default=None)
+
+
+class RequestMetrics:
+    """ Accumulates the time spent in each phase of one request """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.phases = defaultdict(float)
+
+    def add(self, phase, seconds):
+        self.phases[phase] += seconds
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total) -> str:
+        db = self.phases.get('db', 0.0)
+        entries = [f'db;dur={db * 1000:.2f};desc="{self.queries} queries"']
+        entries += [
+            f'{phase};dur={seconds * 1000:.2f}'
+            for phase, seconds in self.phases.items() if phase != 'db'
+        ]
+        entries.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(entries)
+
+
+@contextlib.contextmanager
+def timed(phase):
+    """ Adds the duration of the block to the current request's `phase` """
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add(phase, time.perf_counter() - started)
+
+
+def record_query(execute, sql, params, many, context):
+    """ Database execute wrapper counting, timing and logging slow queries.
+
+    It is installed on every connection as it is opened, rather than per
+    request, so queries that async views run in worker threads are still
+    attributed to the request through the context variable.
+    """
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.queries += 1
+            metrics.add('db', elapsed)
+        if elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+            logger.warning(
+                "Slow query (%.1f ms) on %s: %s",
+                elapsed * 1000, context['connection'].alias, sql
+            )
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """ In-process Prometheus histograms and counters, keyed by route.
+
+    Each worker process keeps its own registry, so a scraper sees the
+    numbers of whichever process answered the scrape.
+    """
+    metrics = (
+        ('inventory_request_duration_seconds', "Total request time.",
+         DURATION_BUCKETS),
+        ('inventory_request_db_seconds', "Time spent in database queries.",
+         DURATION_BUCKETS),
+        ('inventory_request_serialize_seconds', "Time spent rendering data.",
+         DURATION_BUCKETS),
+        ('inventory_request_queries', "Database queries per request.",
+         QUERY_BUCKETS),
+    )
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {name: {} for name, _, _ in self.metrics}
+        self.requests = defaultdict(int)
+
+    def observe(self, route, method, status, metrics, total):
+        phases = metrics.phases
+        values = (
+            total, phases.get('db', 0.0), phases.get('serialize', 0.0),
+            metrics.queries,
+        )
+        labels = (route, method)
+        with self.lock:
+            self.requests[(route, method, status)] += 1
+            for (name, _, buckets), value in zip(self.metrics, values, strict=True):
+                series = self.histograms[name]
+                if labels not in series:
+                    series[labels] = Histogram(buckets)
+                series[labels].observe(value)
+
+    def render(self) -> str:
+        lines = [
+            '# HELP inventory_requests_total Requests served.',
+            '# TYPE inventory_requests_total counter',
+        ]
+        with self.lock:
+            for (route, method, status), count in sorted(self.requests.items()):
+                lines.append(
+                    f'inventory_requests_total{{route="{route}",method="{method}",'
+                    f'status="{status}"}} {count}'
+                )
+            for name, description, buckets in self.metrics:
+                lines += [f'# HELP {name} {description}', f'# TYPE {name} histogram']
+                for (route, method), histogram in sorted(self.histograms[name].items()):
+                    labels = f'route="{route}",method="{method}"'
+                    cumulative = 0
+                    for bound, count in zip(
+                        (*buckets, '+Inf'), histogram.counts, strict=True
+                    ):
+                        cumulative += count
+                        lines.append(
+                            f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+                        )
+                    lines.append(f'{name}_sum{{{labels}}} {histogram.sum}')
+                    lines.append(f'{name}_count{{{labels}}} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class RequestMetricsMiddleware:
+    """ Times each request and reports it through `Server-Timing` and /metrics.
+
+    Database time and query count come from `record_query`; the renderer
+    and authentication add their own phases through `timed`.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        total = metrics.total
+        match = request.resolver_match
+        route = match.view_name if match else 'unmatched'
+        registry.observe(route, request.method, response.status_code, metrics, total)
+        response['Server-Timing'] = metrics.server_timing(total)
+        return response
+
+
+def metrics_view(request):
+    """ Serves the registry in the Prometheus text format.
+
+    When METRICS_TOKEN is set, scrapers must send it as a bearer token.
+    """
+    token = settings.METRICS_TOKEN
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponse(status=401)
+    return HttpResponse(
+        registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
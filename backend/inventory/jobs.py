@@ -0,0 +1,246 @@
+"""
+This script queues, claims and runs background jobs
+"""
+import csv
+import functools
+import io
+import logging
+import uuid
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .caching import bump_version, unit_scope
+from .ledger import record_events, verify_chain
+from .models import (
+    LAB_TEST_STATUS_TRANSITIONS,
+    CustodyEventType,
+    Job,
+    JobKind,
+    JobStatus,
+    LabTestStatus,
+    QualityGrade,
+    Unit,
+)
+from .routers import pin_to_primary
+
+logger = logging.getLogger('inventory.jobs')
+
+# Errors kept on the job for display; the rest are only counted
+MAX_STORED_ERRORS = 100
+
+
+class JobLostError(Exception):
+    """ Another worker took the job over after this one went stale """
+
+
+def claim_job(worker: str) -> Job | None:
+    """ Marks the oldest runnable job as RUNNING for this worker.
+
+    Stale RUNNING jobs count as runnable so a crashed worker's job is
+    resumed. Rows locked by another worker are skipped where the database
+    supports it; the conditional UPDATE makes the claim safe everywhere.
+    """
+    stale = timezone.now() - timedelta(seconds=settings.JOB_STALE_SECONDS)
+    runnable = Job.objects.filter(
+        Q(status=JobStatus.QUEUED)
+        | Q(status=JobStatus.RUNNING, heartbeat_at__lt=stale)
+    ).order_by('created_at')
+    skip_locked = connection.features.has_select_for_update_skip_locked
+
+    with transaction.atomic():
+        candidates = runnable.select_for_update(skip_locked=skip_locked)
+        for job in candidates.only('id', 'status', 'heartbeat_at')[:10]:
+            now = timezone.now()
+            claimed = runnable.filter(
+                pk=job.pk, status=job.status, heartbeat_at=job.heartbeat_at
+            ).update(status=JobStatus.RUNNING, worker=worker, heartbeat_at=now)
+            if claimed:
+                job = Job.objects.get(pk=job.pk)
+                job.attempts += 1
+                job.started_at = job.started_at or now
+                job.save(update_fields=['attempts', 'started_at'])
+                return job
+    return None
+
+
+def run_job(job: Job) -> Job:
+    """ Runs a claimed job to completion, recording success or failure """
+    if job.attempts > settings.JOB_MAX_ATTEMPTS:
+        return finish(job, JobStatus.FAILED, {'detail': "Too many attempts."})
+    try:
+        result = JOB_HANDLERS[job.kind](job)
+    except JobLostError:
+        logger.warning("Job %s was taken over by another worker", job.pk)
+        return job
+    except Exception as exc:
+        logger.exception("Job %s failed", job.pk)
+        return finish(job, JobStatus.FAILED, {'detail': str(exc)})
+    return finish(job, JobStatus.SUCCEEDED, result)
+
+
+def finish(job: Job, status: str, result) -> Job:
+    job.status = status
+    job.result = result
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'finished_at'])
+    return job
+
+
+def open_rows(job: Job):
+    """ Yields the CSV rows of the job's file as dicts """
+    with job.file.open('rb') as handle:
+        yield from csv.DictReader(
+            io.TextIOWrapper(handle, encoding='utf-8-sig', newline='')
+        )
+
+
+def count_rows(job: Job) -> int:
+    with job.file.open('rb') as handle:
+        lines, last = 0, b'\n'
+        while chunk := handle.read(1 << 20):
+            lines += chunk.count(b'\n')
+            last = chunk[-1:]
+        if last != b'\n':
+            lines += 1
+    return max(lines - 1, 0)
+
+
+def ingest_lab_results(job: Job) -> dict:
+    """ Applies a CSV of `unit_id,lab_test_status,quality_grade` rows.
+
+    Rows are applied JOB_CHUNK_SIZE at a time, each chunk in one
+    transaction together with the job's progress, with one UPDATE per
+    distinct (lab_test_status, quality_grade) pair in the chunk. Lab
+    status moves must be allowed by LAB_TEST_STATUS_TRANSITIONS and are
+    written to the custody ledger.
+    """
+    if job.total_rows is None:
+        job.total_rows = count_rows(job)
+        job.save(update_fields=['total_rows'])
+
+    rows = enumerate(
+        islice(open_rows(job), job.position, None), start=job.position
+    )
+    while chunk := list(islice(rows, settings.JOB_CHUNK_SIZE)):
+        with transaction.atomic():
+            check_ownership(job)
+            updated, errors = apply_lab_results(job.organization_id, chunk)
+            job.position = chunk[-1][0] + 1
+            job.updated_units += updated
+            job.error_count += len(errors)
+            job.errors = (job.errors + errors)[:MAX_STORED_ERRORS]
+            job.heartbeat_at = timezone.now()
+            job.save(update_fields=[
+                'position', 'updated_units', 'error_count', 'errors', 'heartbeat_at'
+            ])
+        if updated:
+            bump_version(unit_scope(job.organization_id))
+            pin_to_primary(job.organization_id)
+    return {'updated_units': job.updated_units, 'error_count': job.error_count}
+
+
+def heartbeat(job: Job) -> None:
+    """ Keeps a long running job from looking stale to `claim_job` """
+    job.heartbeat_at = timezone.now()
+    alive = Job.objects.filter(pk=job.pk, worker=job.worker).update(
+        heartbeat_at=job.heartbeat_at
+    )
+    if not alive:
+        raise JobLostError(job.pk)
+
+
+def check_ownership(job: Job) -> None:
+    """ Locks the job row and checks no other worker has resumed it """
+    owner = (
+        Job.objects.select_for_update()
+        .values_list('worker', 'position')
+        .get(pk=job.pk)
+    )
+    if owner != (job.worker, job.position):
+        raise JobLostError(job.pk)
+
+
+def apply_lab_results(organization_id, chunk) -> tuple[int, list]:
+    errors, wanted = [], {}
+    for index, row in chunk:
+        # Line numbers count the header, like a spreadsheet would
+        line = index + 2
+        try:
+            unit_id = uuid.UUID((row.get('unit_id') or '').strip())
+        except ValueError:
+            errors.append({'line': line, 'error': "Invalid unit_id."})
+            continue
+        lab_status = (row.get('lab_test_status') or '').strip() or None
+        grade = (row.get('quality_grade') or '').strip() or None
+        if lab_status and lab_status not in LabTestStatus.values:
+            errors.append({
+                'line': line, 'error': f"Invalid lab_test_status {lab_status}."
+            })
+        elif grade and grade not in QualityGrade.values:
+            errors.append({'line': line, 'error': f"Invalid quality_grade {grade}."})
+        elif not lab_status and not grade:
+            errors.append({'line': line, 'error': "Nothing to update."})
+        else:
+            wanted[unit_id] = (line, lab_status, grade)
+
+    current = dict(
+        Unit.objects.for_organization(organization_id)
+        .select_for_update()
+        .filter(id__in=wanted)
+        .values_list('id', 'lab_test_status')
+    )
+    groups, events = {}, []
+    for unit_id, (line, lab_status, grade) in wanted.items():
+        if unit_id not in current:
+            errors.append({'line': line, 'error': "Unknown unit."})
+            continue
+        old = current[unit_id]
+        if lab_status == old:
+            lab_status = None
+        elif lab_status and lab_status not in LAB_TEST_STATUS_TRANSITIONS[old]:
+            errors.append({
+                'line': line,
+                'error': f"Cannot move lab_test_status from {old} to {lab_status}.",
+            })
+            continue
+        if lab_status:
+            events.append({
+                'unit_id': unit_id,
+                'event_type': CustodyEventType.STATUS,
+                'changes': {'lab_test_status': [old, lab_status]},
+            })
+        if lab_status or grade:
+            groups.setdefault((lab_status, grade), []).append(unit_id)
+
+    now = timezone.now()
+    updated = 0
+    for (lab_status, grade), ids in groups.items():
+        values = {'updated_at': now, 'version': F('version') + 1}
+        if lab_status:
+            values['lab_test_status'] = lab_status
+        if grade:
+            values['quality_grade'] = grade
+        updated += Unit.objects.for_organization(organization_id).filter(
+            id__in=ids
+        ).update(**values)
+    record_events(organization_id, events)
+    return updated, sorted(errors, key=lambda error: error['line'])
+
+
+def verify_ledger(job: Job) -> dict:
+    return verify_chain(
+        job.organization_id,
+        full=job.params.get('full', False),
+        progress=functools.partial(heartbeat, job),
+    )
+
+
+JOB_HANDLERS = {
+    JobKind.LAB_RESULTS: ingest_lab_results,
+    JobKind.VERIFY_LEDGER: verify_ledger,
+}
@@ -0,0 +1,143 @@
+"""
+This script appends to and verifies the hash chained custody ledger
+"""
+import hashlib
+import json
+import uuid
+from collections.abc import Callable
+
+from django.utils import timezone
+
+from .models import CustodyEvent, LedgerCheckpoint, Organization
+
+GENESIS_HASH = '0' * 64
+VERIFY_CHUNK_SIZE = 5000
+
+
+def _canonical_id(value) -> str:
+    return str(uuid.UUID(str(value))) if value else ''
+
+
+def event_hash(event: CustodyEvent) -> str:
+    """ Returns the SHA-256 of an event's content and its predecessor """
+    payload = json.dumps(
+        [
+            event.sequence,
+            _canonical_id(event.organization_id),
+            _canonical_id(event.unit_id),
+            event.event_type,
+            _canonical_id(event.from_organization_id),
+            _canonical_id(event.to_organization_id),
+            event.changes,
+            event.created_at.isoformat(),
+            event.previous_hash,
+        ],
+        sort_keys=True,
+        separators=(',', ':'),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def merkle_root(hashes: list[str]) -> str:
+    """ Folds a list of hex digests pairwise into a single root digest """
+    level = [bytes.fromhex(h) for h in hashes] or [bytes.fromhex(GENESIS_HASH)]
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        level = [
+            hashlib.sha256(level[i] + level[i + 1]).digest()
+            for i in range(0, len(level), 2)
+        ]
+    return level[0].hex()
+
+
+def record_events(organization_id, events: list[dict]) -> list[CustodyEvent]:
+    """ Appends events to an organization's chain.
+
+    Must run inside the transaction that changes the Units, so the unit
+    rows and their ledger entries commit or roll back together. The
+    organization row is locked to serialize appends to its chain.
+    """
+    if not events:
+        return []
+    Organization.objects.select_for_update().only('id').get(pk=organization_id)
+    last = (
+        CustodyEvent.objects.for_organization(organization_id)
+        .order_by('-sequence')
+        .values_list('sequence', 'hash')
+        .first()
+    )
+    sequence, previous_hash = last or (0, GENESIS_HASH)
+
+    now = timezone.now()
+    chain = []
+    for fields in events:
+        sequence += 1
+        event = CustodyEvent(
+            organization_id=organization_id,
+            sequence=sequence,
+            created_at=now,
+            previous_hash=previous_hash,
+            **fields
+        )
+        event.hash = previous_hash = event_hash(event)
+        chain.append(event)
+    return CustodyEvent.objects.bulk_create(chain)
+
+
+def verify_chain(
+    organization_id, full: bool = False, progress: Callable[[], None] | None = None
+) -> dict:
+    """ Verifies the events appended since the last checkpoint.
+
+    Earlier events are covered by the checkpoint's hash, so only the new
+    tail is rehashed. When the tail is intact a new checkpoint holding the
+    Merkle root of its hashes is stored. `full=True` rehashes the whole
+    chain from the start without storing a checkpoint. `progress` is
+    called after every VERIFY_CHUNK_SIZE events.
+    """
+    checkpoint = None if full else (
+        LedgerCheckpoint.objects.for_organization(organization_id)
+        .order_by('-last_sequence')
+        .first()
+    )
+    sequence = checkpoint.last_sequence if checkpoint else 0
+    previous_hash = checkpoint.last_hash if checkpoint else GENESIS_HASH
+
+    events = (
+        CustodyEvent.objects.for_organization(organization_id)
+        .filter(sequence__gt=sequence)
+        .order_by('sequence')
+        .iterator(chunk_size=VERIFY_CHUNK_SIZE)
+    )
+    hashes = []
+    for event in events:
+        if (
+            event.sequence != sequence + 1
+            or event.previous_hash != previous_hash
+            or event.hash != event_hash(event)
+        ):
+            return {
+                'valid': False,
+                'verified': len(hashes),
+                'first_invalid_sequence': sequence + 1,
+            }
+        sequence, previous_hash = event.sequence, event.hash
+        hashes.append(event.hash)
+        if progress and len(hashes) % VERIFY_CHUNK_SIZE == 0:
+            progress()
+
+    result = {'valid': True, 'verified': len(hashes), 'last_sequence': sequence}
+    if hashes and not full:
+        checkpoint, _ = LedgerCheckpoint.objects.get_or_create(
+            organization_id=organization_id,
+            last_sequence=sequence,
+            defaults={
+                'first_sequence': sequence - len(hashes) + 1,
+                'last_hash': previous_hash,
+                'merkle_root': merkle_root(hashes),
+            },
+        )
+    if checkpoint:
+        result['merkle_root'] = checkpoint.merkle_root
+    return result
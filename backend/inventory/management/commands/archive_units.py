@@ -0,0 +1,55 @@
+"""
+This script moves closed units into the archive table in batches
+"""
+import signal
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from inventory.archive import archivable_units, archive_batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves ARCHIVED and DISPOSED units not written for --older-than-days "
+        "into the archive table. Each batch commits on its own, so the "
+        "command can be stopped at any time and run again to resume."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int,
+                            default=settings.ARCHIVE_AFTER_DAYS)
+        parser.add_argument('--batch-size', type=int,
+                            default=settings.ARCHIVE_BATCH_SIZE)
+        parser.add_argument('--max-batches', type=int,
+                            help="Stop after this many batches.")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only count the units that would move.")
+
+    def handle(self, *args, **options):
+        # Fixed at the start so units closed during the run wait for the next
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        if options['dry_run']:
+            count = archivable_units(cutoff).count()
+            self.stdout.write(f"{count} units would be archived.")
+            return
+
+        self.stopping = False
+        # Finish the current batch, then exit
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        moved = batches = 0
+        while not self.stopping and batches != options['max_batches']:
+            count = archive_batch(cutoff, options['batch_size'])
+            if not count:
+                break
+            moved += count
+            batches += 1
+            self.stdout.write(f"Archived {moved} units")
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} units in total."))
+
+    def stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,159 @@
+"""
+This script benchmarks the inventory API endpoints
+"""
+import json
+import random
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import UTC, datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from inventory.models import Unit, UnitType, User
+
+from .seed_inventory import BENCHMARK_PASSWORD
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures latency percentiles, queries per request and peak memory "
+        "for the token, list, retrieve, create and lineage endpoints, "
+        "in-process against the configured database, and prints JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50,
+                            help="Timed requests per scenario.")
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--username',
+                            help="Defaults to the newest seeded benchmark user.")
+        parser.add_argument('--password', default=BENCHMARK_PASSWORD)
+        parser.add_argument('--output', help="Also write the JSON to this file.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['username'])
+        rng = random.Random(options['seed'])
+        client = Client(HTTP_HOST='localhost')
+
+        credentials = {'username': user.username, 'password': options['password']}
+        response = client.post('/api/token/', credentials)
+        if response.status_code != 200:
+            raise CommandError(f"Could not obtain a token: {response.content!r}")
+        auth = {'HTTP_AUTHORIZATION': f"Bearer {response.json()['access']}"}
+
+        units = Unit.objects.for_organization(user.organization_id)
+        unit_ids = list(units.values_list('id', flat=True)[:1000])
+        final_ids = list(
+            units.filter(unit_type=UnitType.FINAL).values_list('id', flat=True)[:1000]
+        ) or unit_ids
+        if not unit_ids:
+            raise CommandError("The benchmark organization has no units.")
+
+        scenarios = {
+            'token': lambda i: client.post('/api/token/', credentials),
+            # A unique parameter per request keeps the response cache cold
+            'list': lambda i: client.get(
+                f'/api/units/?page_size=100&bench={i}', **auth
+            ),
+            'list_cached': lambda i: client.get('/api/units/?page_size=100', **auth),
+            'list_filtered': lambda i: client.get(
+                f'/api/units/?status=ACTIVE&unit_type=FINAL&bench={i}', **auth
+            ),
+            'retrieve': lambda i: client.get(
+                f'/api/units/{rng.choice(unit_ids)}/?bench={i}', **auth
+            ),
+            'lineage': lambda i: client.get(
+                f'/api/units/{rng.choice(final_ids)}/lineage/', **auth
+            ),
+            'create': lambda i: client.post(
+                '/api/units/',
+                {'cultivar_name': 'bench-create', 'weight': 1},
+                content_type='application/json',
+                **auth
+            ),
+        }
+
+        results = {
+            name: self.measure(request, options['requests'], options['warmup'])
+            for name, request in scenarios.items()
+        }
+        report = {
+            'meta': {
+                'commit': self.get_commit(),
+                'timestamp': datetime.now(UTC).isoformat(),
+                'vendor': connection.vendor,
+                'organization_units': units.count(),
+                'requests_per_scenario': options['requests'],
+            },
+            'results': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+        self.stdout.write(output)
+
+    @staticmethod
+    def get_user(username):
+        users = User.objects.exclude(organization=None)
+        if username:
+            users = users.filter(username=username)
+        else:
+            users = users.filter(username__startswith='bench-')
+        user = users.order_by('-date_joined').first()
+        if user is None:
+            raise CommandError(
+                "No benchmark user found; run `manage.py seed_inventory` first."
+            )
+        return user
+
+    @staticmethod
+    def get_commit():
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    @staticmethod
+    def measure(request, count, warmup):
+        for i in range(warmup):
+            request(-1 - i)
+
+        latencies, queries, statuses = [], [], set()
+        for i in range(count):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = request(i)
+                latencies.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured))
+            statuses.add(response.status_code)
+
+        # Memory is sampled separately since tracing skews the timings
+        tracemalloc.start()
+        request(count)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            'p50_ms': round(percentile(latencies, 0.50), 3),
+            'p95_ms': round(percentile(latencies, 0.95), 3),
+            'p99_ms': round(percentile(latencies, 0.99), 3),
+            'mean_ms': round(statistics.fmean(latencies), 3),
+            'queries_per_request': round(statistics.fmean(queries), 2),
+            'peak_memory_kib': round(peak / 1024, 1),
+            'status_codes': sorted(statuses),
+        }
@@ -0,0 +1,73 @@
+"""
+This script compares the Unit list serialization paths
+"""
+import json
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from inventory.models import Organization, Unit
+from inventory.renderers import ORJSONRenderer
+from inventory.serializers import UnitSerializer, ValuesRowSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds units in a rolled back transaction and reports rows/sec for "
+        "UnitSerializer + JSONRenderer versus .values() rows + ORJSONRenderer."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            results = self.run(**options)
+            transaction.set_rollback(True)
+        self.stdout.write(json.dumps(results))
+
+    def run(self, rows, repeat, **options):
+        organization = Organization.objects.create(
+            name=f'benchmark-{uuid.uuid4()}',
+            licence_number=f'BENCH-{uuid.uuid4().hex[:12]}'
+        )
+        Unit.objects.bulk_create(
+            Unit(cultivar_name=f'bench-{i}', weight=1 + i % 50,
+                 description='Benchmark unit', current_owner=organization)
+            for i in range(rows)
+        )
+        queryset = Unit.objects.filter(current_owner=organization)
+
+        def model_serializer():
+            data = UnitSerializer(list(queryset), many=True).data
+            return JSONRenderer().render(data)
+
+        def values_rows():
+            row_serializer = ValuesRowSerializer(UnitSerializer)
+            data = row_serializer.to_representation(
+                list(queryset.values(*row_serializer.fields))
+            )
+            return ORJSONRenderer().render(data)
+
+        results = {'rows': rows}
+        for name, path in (
+            ('model_serializer', model_serializer),
+            ('values_rows', values_rows),
+        ):
+            best = min(self.time(path) for _ in range(repeat))
+            results[f'{name}_rows_per_sec'] = round(rows / best)
+        results['speedup'] = round(
+            results['values_rows_rows_per_sec']
+            / results['model_serializer_rows_per_sec'], 2
+        )
+        return results
+
+    @staticmethod
+    def time(path):
+        started = time.perf_counter()
+        path()
+        return time.perf_counter() - started
@@ -0,0 +1,70 @@
+"""
+This script measures Unit write throughput under parallel clients
+"""
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection, transaction
+
+from inventory.models import Organization, Unit
+
+
+class Command(BaseCommand):
+    help = (
+        "Inserts units from several threads, one transaction per write, "
+        "and reports writes/sec for the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=8)
+        parser.add_argument('--writes', type=int, default=250,
+                            help="Writes per client.")
+
+    def handle(self, *args, **options):
+        clients, writes = options['clients'], options['writes']
+        organization = Organization.objects.create(
+            name=f'benchmark-{uuid.uuid4()}',
+            licence_number=f'BENCH-{uuid.uuid4().hex[:12]}'
+        )
+
+        def client(_):
+            latencies = []
+            try:
+                for i in range(writes):
+                    started = time.perf_counter()
+                    with transaction.atomic():
+                        Unit.objects.create(
+                            cultivar_name=f'bench-{i}',
+                            weight=1,
+                            current_owner=organization
+                        )
+                    latencies.append(time.perf_counter() - started)
+            finally:
+                close_old_connections()
+                connection.close()
+            return latencies
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            latencies = sorted(
+                latency
+                for result in pool.map(client, range(clients))
+                for latency in result
+            )
+        elapsed = time.perf_counter() - started
+
+        Unit.objects.filter(current_owner=organization).delete()
+        organization.delete()
+
+        self.stdout.write(json.dumps({
+            'vendor': connection.vendor,
+            'clients': clients,
+            'writes': len(latencies),
+            'seconds': round(elapsed, 3),
+            'writes_per_sec': round(len(latencies) / elapsed, 1),
+            'p50_ms': round(latencies[len(latencies) // 2] * 1000, 2),
+            'p99_ms': round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+        }))
@@ -0,0 +1,49 @@
+"""
+This script runs queued background jobs
+"""
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from inventory.jobs import claim_job, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Claims and runs queued jobs until stopped. Start several to work "
+        "in parallel; each job is claimed by exactly one worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Exit once the queue is empty.")
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help="Seconds to wait when the queue is empty.")
+        parser.add_argument('--worker-id',
+                            default=f'{socket.gethostname()}:{os.getpid()}')
+
+    def handle(self, *args, **options):
+        worker = options['worker_id']
+        self.stopping = False
+        # Finish the current job, then exit
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        while not self.stopping:
+            close_old_connections()
+            job = claim_job(worker)
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+            self.stdout.write(f"{worker} running {job.kind} {job.pk}")
+            job = run_job(job)
+            self.stdout.write(f"{worker} finished {job.pk}: {job.status}")
+
+    def stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,117 @@
+"""
+This script seeds synthetic organizations and unit trees for benchmarks
+"""
+import random
+import uuid
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from inventory.models import (
+    LabTestStatus,
+    Organization,
+    QualityGrade,
+    Unit,
+    UnitStatus,
+    UnitType,
+    User,
+)
+
+CULTIVARS = (
+    'Blue Dream', 'Sour Diesel', 'Northern Lights', 'Granddaddy Purple',
+    'Green Crack', 'Jack Herer', 'Durban Poison', 'Girl Scout Cookies',
+)
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates organizations, each with a benchmark user and harvest -> "
+        "processed -> final unit trees, inserted with bulk_create."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organizations', type=int, default=3)
+        parser.add_argument('--units', type=int, default=100000,
+                            help="Units per organization.")
+        parser.add_argument('--children', type=int, default=3,
+                            help="Derived units per parent at each level.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        for _ in range(options['organizations']):
+            organization = self.seed_organization(rng, **options)
+            self.stdout.write(
+                f"Seeded {organization.name} (user {organization.name}-user)"
+            )
+
+    def seed_organization(self, rng, units, children, batch_size, **options):
+        suffix = uuid.uuid4().hex[:8]
+        organization = Organization.objects.create(
+            name=f'bench-{suffix}', licence_number=f'BENCH-{suffix}'
+        )
+        User.objects.create_user(
+            f'{organization.name}-user',
+            password=BENCHMARK_PASSWORD,
+            organization=organization
+        )
+
+        # Each harvest yields `children` processed units, each of which
+        # yields `children` final products. Trees are listed parents first,
+        # so trimming the last batch never orphans a unit.
+        created = 0
+        while created < units:
+            batch = []
+            while len(batch) < batch_size and created + len(batch) < units:
+                batch.extend(self.build_tree(rng, organization, children))
+            batch = batch[:units - created]
+            with transaction.atomic():
+                Unit.objects.bulk_create(batch, batch_size=batch_size)
+            created += len(batch)
+        return organization
+
+    def build_tree(self, rng, organization, children):
+        harvested = date.today() - timedelta(days=rng.randrange(730))
+        cultivar = rng.choice(CULTIVARS)
+        harvest = self.build_unit(
+            rng, organization, cultivar, harvested, UnitType.HARVEST, None
+        )
+        tree = [harvest]
+        for _ in range(children):
+            processed = self.build_unit(
+                rng, organization, cultivar, harvested, UnitType.PROCESSED, harvest
+            )
+            tree.append(processed)
+            tree.extend(
+                self.build_unit(
+                    rng, organization, cultivar, harvested, UnitType.FINAL,
+                    processed
+                )
+                for _ in range(children)
+            )
+        return tree
+
+    @staticmethod
+    def build_unit(rng, organization, cultivar, harvested, unit_type, parent):
+        unit = Unit(
+            cultivar_name=cultivar,
+            weight=round(rng.uniform(0.5, 500), 2),
+            unit_type=unit_type,
+            date_harvested=harvested,
+            status=rng.choice(UnitStatus.values),
+            lab_test_status=rng.choice(LabTestStatus.values),
+            quality_grade=rng.choice(QualityGrade.values),
+            storage_location=f'Vault {rng.randrange(1, 40)}',
+            # Spread across the south-western United States
+            gps_coordinates=(
+                f'{rng.uniform(31.3, 37.0):.4f}, {rng.uniform(-114.8, -103.0):.4f}'
+            ),
+            description=f'{unit_type.label} of {cultivar}',
+            current_owner=organization,
+            parent_unit=parent,
+        )
+        unit.locate()
+        return unit
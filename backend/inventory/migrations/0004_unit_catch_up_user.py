@@ -0,0 +1,99 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:55
+
+import django.contrib.auth.models
+import django.contrib.auth.validators
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('inventory', '0003_remove_organization_type_organization_address_and_more'),
+    ]
+
+    run_before = [
+        ('admin', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='unit',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.RenameField(
+            model_name='unit',
+            old_name='name',
+            new_name='cultivar_name',
+        ),
+        migrations.AddField(
+            model_name='unit',
+            name='date_harvested',
+            field=models.DateField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='unit',
+            name='gps_coordinates',
+            field=models.CharField(default='Unknown', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='unit',
+            name='quality_grade',
+            field=models.CharField(choices=[('A', 'Grade A (Premium)'), ('B', 'Grade B (Standard)'), ('C', 'Grade C (Low)'), ('PENDING', 'Pending')], default='PENDING', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='unit',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='unit',
+            name='lab_test_status',
+            field=models.CharField(choices=[('PENDING', 'Lab Test Pending'), ('PASS', 'Passed'), ('FAIL', 'Failed')], default='PENDING', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='unit',
+            name='parent_unit',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='processed_units', to='inventory.unit'),
+        ),
+        migrations.AlterField(
+            model_name='unit',
+            name='storage_location',
+            field=models.CharField(default='Unknown', help_text='e.g., 34.0552, -110.5523', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='unit',
+            name='unit_type',
+            field=models.CharField(choices=[('HARVEST', 'Harvested Raw Material'), ('PROCESSED', 'Processed Product'), ('FINAL', 'Final Product')], default='HARVEST', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='User',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('password', models.CharField(max_length=128, verbose_name='password')),
+                ('last_login', models.DateTimeField(blank=True, null=True, verbose_name='last login')),
+                ('is_superuser', models.BooleanField(default=False, help_text='Designates that this user has all permissions without explicitly assigning them.', verbose_name='superuser status')),
+                ('username', models.CharField(error_messages={'unique': 'A user with that username already exists.'}, help_text='Required. 150 characters or fewer. Letters, digits and @/./+/-/_ only.', max_length=150, unique=True, validators=[django.contrib.auth.validators.UnicodeUsernameValidator()], verbose_name='username')),
+                ('first_name', models.CharField(blank=True, max_length=150, verbose_name='first name')),
+                ('last_name', models.CharField(blank=True, max_length=150, verbose_name='last name')),
+                ('email', models.EmailField(blank=True, max_length=254, verbose_name='email address')),
+                ('is_staff', models.BooleanField(default=False, help_text='Designates whether the user can log into this admin site.', verbose_name='staff status')),
+                ('is_active', models.BooleanField(default=True, help_text='Designates whether this user should be treated as active. Unselect this instead of deleting accounts.', verbose_name='active')),
+                ('date_joined', models.DateTimeField(default=django.utils.timezone.now, verbose_name='date joined')),
+                ('role', models.CharField(choices=[('ADMIN', 'Admin'), ('WORKER', 'Worker')], default='WORKER', max_length=20)),
+                ('groups', models.ManyToManyField(blank=True, help_text='The groups this user belongs to. A user will get all permissions granted to each of their groups.', related_name='user_set', related_query_name='user', to='auth.group', verbose_name='groups')),
+                ('organization', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='users', to='inventory.organization')),
+                ('user_permissions', models.ManyToManyField(blank=True, help_text='Specific permissions for this user.', related_name='user_set', related_query_name='user', to='auth.permission', verbose_name='user permissions')),
+            ],
+            options={
+                'verbose_name': 'user',
+                'verbose_name_plural': 'users',
+                'abstract': False,
+            },
+            managers=[
+                ('objects', django.contrib.auth.models.UserManager()),
+            ],
+        ),
+    ]
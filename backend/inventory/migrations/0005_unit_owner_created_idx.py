@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_unit_catch_up_user'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='unit',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='unit',
+            index=models.Index(fields=['current_owner', '-created_at', '-id'], name='unit_owner_created_idx'),
+        ),
+    ]
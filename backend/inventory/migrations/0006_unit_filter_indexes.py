@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_unit_owner_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='unit',
+            index=models.Index(fields=['current_owner', 'status', '-created_at', '-id'], name='unit_owner_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='unit',
+            index=models.Index(fields=['current_owner', 'unit_type', '-created_at', '-id'], name='unit_owner_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='unit',
+            index=models.Index(fields=['current_owner', 'quality_grade'], name='unit_owner_grade_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='unit',
+            index=models.Index(fields=['current_owner', 'date_harvested'], name='unit_owner_harvested_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='unit',
+            index=models.Index(condition=models.Q(('lab_test_status', 'PENDING')), fields=['current_owner', '-created_at', '-id'], name='unit_owner_lab_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_unit_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustodyEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveBigIntegerField()),
+                ('event_type', models.CharField(choices=[('CREATED', 'Unit Created'), ('STATUS', 'Status Changed'), ('TRANSFER', 'Ownership Transferred'), ('DELETED', 'Unit Deleted')], max_length=20)),
+                ('changes', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField()),
+                ('previous_hash', models.CharField(max_length=64)),
+                ('hash', models.CharField(max_length=64, unique=True)),
+                ('from_organization', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='inventory.organization')),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='custody_events', to='inventory.organization')),
+                ('to_organization', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='inventory.organization')),
+                ('unit', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='custody_events', to='inventory.unit')),
+            ],
+            options={
+                'ordering': ['organization', 'sequence'],
+                'indexes': [models.Index(fields=['unit', 'sequence'], name='custody_event_unit_idx')],
+                'constraints': [models.UniqueConstraint(fields=('organization', 'sequence'), name='custody_event_sequence_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_sequence', models.PositiveBigIntegerField()),
+                ('last_sequence', models.PositiveBigIntegerField()),
+                ('last_hash', models.CharField(max_length=64)),
+                ('merkle_root', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='ledger_checkpoints', to='inventory.organization')),
+            ],
+            options={
+                'ordering': ['organization', '-last_sequence'],
+                'constraints': [models.UniqueConstraint(fields=('organization', 'last_sequence'), name='ledger_checkpoint_sequence_uniq')],
+            },
+        ),
+    ]
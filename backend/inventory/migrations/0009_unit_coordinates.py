@@ -0,0 +1,109 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:20
+
+import re
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+# Frozen copies of inventory.geo as of this migration, so later changes
+# there cannot alter what this backfill writes
+GEOHASH_PRECISION = 9
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+COORDINATES = re.compile(
+    r'^\s*\(?\s*(-?\d+(?:\.\d+)?)\s*[,;\s]\s*(-?\d+(?:\.\d+)?)\s*\)?\s*$'
+)
+
+
+def parse_coordinates(text):
+    match = COORDINATES.match(text or '')
+    if match is None:
+        return None
+    latitude, longitude = float(match[1]), float(match[2])
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return latitude, longitude
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        span, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (span[0] + span[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            span[0] = middle
+        else:
+            span[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def parse_locations(apps, schema_editor):
+    Unit = apps.get_model('inventory', 'Unit')
+    connection = schema_editor.connection
+    quote = connection.ops.quote_name
+    pk = Unit._meta.pk
+    # A plain executemany is far cheaper than bulk_update's CASE statements
+    sql = 'UPDATE {} SET {} = %s, {} = %s, {} = %s WHERE {} = %s'.format(
+        quote(Unit._meta.db_table), quote('latitude'), quote('longitude'),
+        quote('geohash'), quote(pk.column)
+    )
+    rows = Unit.objects.values_list(
+        'id', 'gps_coordinates', 'storage_location'
+    ).iterator(chunk_size=BATCH_SIZE)
+    batch = []
+    with connection.cursor() as cursor:
+        for unit_id, gps_coordinates, storage_location in rows:
+            point = (
+                parse_coordinates(gps_coordinates)
+                or parse_coordinates(storage_location)
+            )
+            if point is None:
+                continue
+            batch.append((
+                *point, encode_geohash(*point),
+                pk.get_db_prep_value(unit_id, connection)
+            ))
+            if len(batch) == BATCH_SIZE:
+                cursor.executemany(sql, batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_revoked_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='unit',
+            name='geohash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=12),
+        ),
+        migrations.AddField(
+            model_name='unit',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='unit',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(parse_locations, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='unit',
+            index=models.Index(fields=['current_owner', 'geohash'], name='unit_owner_geohash_idx'),
+        ),
+    ]
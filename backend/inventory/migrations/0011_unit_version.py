@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_job_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='unit',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0012_unit_owner_updated_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedUnit',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('cultivar_name', models.CharField(max_length=100)),
+                ('weight', models.FloatField()),
+                ('unit_type', models.CharField(choices=[('HARVEST', 'Harvested Raw Material'), ('PROCESSED', 'Processed Product'), ('FINAL', 'Final Product')], max_length=20)),
+                ('date_harvested', models.DateField()),
+                ('status', models.CharField(choices=[('ACTIVE', 'Active in Inventory'), ('TRANSIT', 'In Transit'), ('ARCHIVED', 'Archived/Sold'), ('DISPOSED', 'Disposed/Destroyed')], max_length=20)),
+                ('lab_test_status', models.CharField(choices=[('PENDING', 'Lab Test Pending'), ('PASS', 'Passed'), ('FAIL', 'Failed')], max_length=10)),
+                ('storage_location', models.CharField(max_length=255)),
+                ('gps_coordinates', models.CharField(max_length=50)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('geohash', models.CharField(blank=True, default='', max_length=12)),
+                ('quality_grade', models.CharField(choices=[('A', 'Grade A (Premium)'), ('B', 'Grade B (Standard)'), ('C', 'Grade C (Low)'), ('PENDING', 'Pending')], max_length=50)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('parent_unit', models.UUIDField(blank=True, db_column='parent_unit_id', null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('version', models.PositiveIntegerField()),
+                ('archived_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='custodyevent',
+            name='event_type',
+            field=models.CharField(choices=[('CREATED', 'Unit Created'), ('STATUS', 'Status Changed'), ('TRANSFER', 'Ownership Transferred'), ('DELETED', 'Unit Deleted'), ('ARCHIVED', 'Unit Archived')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='unit',
+            name='parent_unit',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='processed_units', to='inventory.unit'),
+        ),
+        migrations.AddIndex(
+            model_name='unit',
+            index=models.Index(condition=models.Q(('status__in', ['ARCHIVED', 'DISPOSED'])), fields=['updated_at'], name='unit_closed_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedunit',
+            name='current_owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_units', to='inventory.organization'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedunit',
+            index=models.Index(fields=['current_owner', '-created_at', '-id'], name='archived_unit_owner_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedunit',
+            index=models.Index(fields=['current_owner', 'status', '-created_at', '-id'], name='archived_unit_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedunit',
+            index=models.Index(fields=['parent_unit'], name='archived_unit_parent_idx'),
+        ),
+    ]
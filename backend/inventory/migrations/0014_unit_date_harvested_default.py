@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:24
+
+from django.db import migrations, models
+
+import inventory.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0013_unit_archive'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='unit',
+            name='date_harvested',
+            field=models.DateField(default=inventory.models.today),
+        ),
+    ]
@@ -4,11 +4,17 @@ This script is the model that communicates with the database
 import uuid
 
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import connections, models
 from django.db.models import TextChoices
 from django.utils import timezone
 
-from inventory.models import Organization
+from .geo import encode_geohash, parse_coordinates
+
+
+def today():
+    """ Today's date in the current timezone; timezone.now is a datetime """
+    return timezone.localdate()
+
 
 class UnitType(TextChoices):
     HARVEST = 'HARVEST','Harvested Raw Material'
@@ -28,6 +34,39 @@ class LabTestStatus(TextChoices):
     PASS = 'PASS', 'Passed'
     FAIL = 'FAIL', 'Failed'
 
+# Allowed moves between statuses; a bulk transition only touches units
+# whose current value is a key that lists the requested target.
+UNIT_STATUS_TRANSITIONS = {
+    UnitStatus.ACTIVE: {
+        UnitStatus.TRANSIT, UnitStatus.ARCHIVED, UnitStatus.DISPOSED
+    },
+    UnitStatus.TRANSIT: {
+        UnitStatus.ACTIVE, UnitStatus.ARCHIVED, UnitStatus.DISPOSED
+    },
+    UnitStatus.ARCHIVED: set(),
+    UnitStatus.DISPOSED: set(),
+}
+
+LAB_TEST_STATUS_TRANSITIONS = {
+    LabTestStatus.PENDING: {LabTestStatus.PASS, LabTestStatus.FAIL},
+    LabTestStatus.PASS: set(),
+    LabTestStatus.FAIL: {LabTestStatus.PENDING},
+}
+
+
+def allowed_sources(transitions: dict, target: str) -> list[str]:
+    """ Returns the statuses that may move to the target status """
+    return [
+        source for source, targets in transitions.items() if target in targets
+    ]
+
+class CustodyEventType(TextChoices):
+    CREATED = 'CREATED', 'Unit Created'
+    STATUS = 'STATUS', 'Status Changed'
+    TRANSFER = 'TRANSFER', 'Ownership Transferred'
+    DELETED = 'DELETED', 'Unit Deleted'
+    ARCHIVED = 'ARCHIVED', 'Unit Archived'
+
 class QualityGrade(TextChoices):
         GRADE_A = 'A', 'Grade A (Premium)'
         GRADE_B = 'B', 'Grade B (Standard)'
@@ -35,6 +74,37 @@ class QualityGrade(TextChoices):
         PENDING = 'PENDING', 'Pending'
 
 
+class JobKind(TextChoices):
+    LAB_RESULTS = 'LAB_RESULTS', 'Lab Result Import'
+    VERIFY_LEDGER = 'VERIFY_LEDGER', 'Ledger Verification'
+
+
+class JobStatus(TextChoices):
+    QUEUED = 'QUEUED', 'Queued'
+    RUNNING = 'RUNNING', 'Running'
+    SUCCEEDED = 'SUCCEEDED', 'Succeeded'
+    FAILED = 'FAILED', 'Failed'
+
+
+class TenantQuerySet(models.QuerySet):
+    """ Rows that belong to an organization.
+
+    Each model names its organization column in `tenant_field`. That
+    column leads the model's composite indexes, so a queryset built from
+    `for_organization` stays within one tenant's slice of every index.
+    """
+
+    def for_organization(self, organization_id) -> 'TenantQuerySet':
+        """ Returns the organization's rows, or none without an organization """
+        if not organization_id:
+            return self.none()
+        return self.filter(**{self.model.tenant_field: organization_id})
+
+
+class TenantManager(models.Manager.from_queryset(TenantQuerySet)):
+    pass
+
+
 class Organization(models.Model):
     """ This class defines the Organization table"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -45,10 +115,85 @@ class Organization(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    tenant_field = 'pk'
+    objects = TenantManager()
 
     def __str__(self) -> str:
         return self.name
 
+class UnitManager(TenantManager):
+    """ Traverses the parent_unit tree with recursive CTE queries.
+
+    The tree is walked across Unit and ArchivedUnit, so lineage still
+    reaches units that were archived; those carry their `archived_at`.
+    """
+    max_lineage_depth = 100
+
+    _lineage_sql = """
+        WITH RECURSIVE lineage(id, parent_unit_id, depth) AS (
+            SELECT id, parent_unit_id, 0 FROM {units} u WHERE id = %s
+            UNION ALL
+            {steps}
+        )
+        SELECT {columns}, NULL AS archived_at, l.depth
+        FROM {table} u JOIN lineage l ON u.id = l.id
+        WHERE l.depth > 0 AND u.current_owner_id = %s
+        UNION ALL
+        SELECT {columns}, u.archived_at, l.depth
+        FROM {archive} u JOIN lineage l ON u.id = l.id
+        WHERE l.depth > 0 AND u.current_owner_id = %s
+        ORDER BY depth
+    """
+    _lineage_step = """
+            SELECT u.id, u.parent_unit_id, l.depth + 1
+            FROM {source} u JOIN lineage l ON {join}
+            WHERE l.depth < %s
+    """
+
+    def ancestors(self, unit: 'Unit | ArchivedUnit') -> models.query.RawQuerySet:
+        """ Returns the unit's parents up to the root, nearest first """
+        return self._lineage(unit, 'u.id = l.parent_unit_id')
+
+    def descendants(self, unit: 'Unit | ArchivedUnit') -> models.query.RawQuerySet:
+        """ Returns every unit derived from the unit, nearest first """
+        return self._lineage(unit, 'u.parent_unit_id = l.id')
+
+    def _lineage(
+        self, unit: 'Unit | ArchivedUnit', join: str
+    ) -> models.query.RawQuerySet:
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        table = quote(self.model._meta.db_table)
+        archive = quote(ArchivedUnit._meta.db_table)
+        columns = ', '.join(
+            f'u.{quote(field.column)}' for field in self.model._meta.concrete_fields
+        )
+        units = (
+            f'(SELECT id, parent_unit_id FROM {table} '
+            f'UNION ALL SELECT id, parent_unit_id FROM {archive})'
+        )
+        if connection.vendor == 'sqlite':
+            # SQLite materializes a UNION joined in the recursive step, so
+            # it gets one recursive SELECT per table instead
+            sources = [table, archive]
+        else:
+            sources = [units]
+        steps = 'UNION ALL'.join(
+            self._lineage_step.format(source=source, join=join)
+            for source in sources
+        )
+        pk = self.model._meta.pk.get_db_prep_value(unit.pk, connection)
+        owner = self.model._meta.get_field('current_owner').get_db_prep_value(
+            unit.current_owner_id, connection
+        )
+        sql = self._lineage_sql.format(
+            units=units, steps=steps, columns=columns, table=table, archive=archive
+        )
+        return self.raw(
+            sql, [pk, *[self.max_lineage_depth] * len(sources), owner, owner]
+        )
+
+
 class Unit(models.Model):
     """ This class defines the Unit table"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -59,7 +204,7 @@ class Unit(models.Model):
         choices=UnitType.choices,
         default=UnitType.HARVEST
     )
-    date_harvested = models.DateField(default=timezone.now)
+    date_harvested = models.DateField(default=today)
     status = models.CharField(
         max_length=20,
         choices=UnitStatus.choices,
@@ -72,6 +217,10 @@ class Unit(models.Model):
     )
     storage_location = models.CharField(max_length=255, default='Unknown', help_text="e.g., 34.0552, -110.5523")
     gps_coordinates = models.CharField(max_length=50, default='Unknown')
+    # Parsed from gps_coordinates (or storage_location) by `locate`
+    latitude = models.FloatField(null=True, blank=True, editable=False)
+    longitude = models.FloatField(null=True, blank=True, editable=False)
+    geohash = models.CharField(max_length=12, blank=True, default='', editable=False)
     quality_grade = models.CharField(
         max_length=50,
         choices=QualityGrade.choices,
@@ -85,18 +234,142 @@ class Unit(models.Model):
         on_delete=models.PROTECT,
         related_name='owned_units'
     )
+    # Unconstrained so a unit can keep pointing at an archived parent
     parent_unit = models.ForeignKey(
         'self',
         on_delete=models.SET_NULL,
         null=True,
         blank=True,
+        db_constraint=False,
         related_name='processed_units'
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Bumped by every write; API updates are conditional on it (If-Match)
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    tenant_field = 'current_owner'
+    objects = UnitManager()
 
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [  # noqa: RUF012
+            models.Index(
+                fields=['current_owner', '-created_at', '-id'],
+                name='unit_owner_created_idx'
+            ),
+            models.Index(
+                fields=['current_owner', 'status', '-created_at', '-id'],
+                name='unit_owner_status_idx'
+            ),
+            models.Index(
+                fields=['current_owner', 'unit_type', '-created_at', '-id'],
+                name='unit_owner_type_idx'
+            ),
+            models.Index(
+                fields=['current_owner', 'quality_grade'],
+                name='unit_owner_grade_idx'
+            ),
+            models.Index(
+                fields=['current_owner', 'date_harvested'],
+                name='unit_owner_harvested_idx'
+            ),
+            models.Index(
+                fields=['current_owner', '-created_at', '-id'],
+                name='unit_owner_lab_pending_idx',
+                condition=models.Q(lab_test_status=LabTestStatus.PENDING)
+            ),
+            models.Index(
+                fields=['current_owner', 'geohash'],
+                name='unit_owner_geohash_idx'
+            ),
+            models.Index(
+                fields=['current_owner', 'updated_at', 'id'],
+                name='unit_owner_updated_idx'
+            ),
+            models.Index(
+                fields=['updated_at'],
+                name='unit_closed_updated_idx',
+                condition=models.Q(
+                    status__in=[UnitStatus.ARCHIVED, UnitStatus.DISPOSED]
+                )
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.cultivar_name} ({self.id})"
+
+    def locate(self) -> None:
+        """ Sets the numeric coordinates from the free-text location fields.
+
+        Call it before `bulk_create`, which bypasses `save`.
+        """
+        point = (
+            parse_coordinates(self.gps_coordinates)
+            or parse_coordinates(self.storage_location)
+        )
+        self.latitude, self.longitude = point or (None, None)
+        self.geohash = encode_geohash(*point) if point else ''
+
+    def save(self, *args, **kwargs):
+        self.locate()
+        if not self._state.adding:
+            self.version += 1
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = {*update_fields, 'version'}
+            if update_fields & {'gps_coordinates', 'storage_location'}:
+                update_fields |= {'latitude', 'longitude', 'geohash'}
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
+class ArchivedUnit(models.Model):
+    """ A closed Unit moved out of the Unit table by `archive_units`.
+
+    Columns match Unit's so rows are copied across unchanged. parent_unit
+    is a plain id because the parent may live in either table.
+    """
+    id = models.UUIDField(primary_key=True, editable=False)
+    cultivar_name = models.CharField(max_length=100)
+    weight = models.FloatField()
+    unit_type = models.CharField(max_length=20, choices=UnitType.choices)
+    date_harvested = models.DateField()
+    status = models.CharField(max_length=20, choices=UnitStatus.choices)
+    lab_test_status = models.CharField(max_length=10, choices=LabTestStatus.choices)
+    storage_location = models.CharField(max_length=255)
+    gps_coordinates = models.CharField(max_length=50)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, default='')
+    quality_grade = models.CharField(max_length=50, choices=QualityGrade.choices)
+    description = models.TextField(blank=True, null=True)
+    current_owner = models.ForeignKey(
+        Organization,
+        on_delete=models.PROTECT,
+        related_name='archived_units'
+    )
+    parent_unit = models.UUIDField(null=True, blank=True, db_column='parent_unit_id')
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    version = models.PositiveIntegerField()
+    archived_at = models.DateTimeField()
+
+    tenant_field = 'current_owner'
+    objects = TenantManager()
+
+    class Meta:
+        ordering = ['-created_at', '-id']  # noqa: RUF012
+        indexes = [  # noqa: RUF012
+            models.Index(
+                fields=['current_owner', '-created_at', '-id'],
+                name='archived_unit_owner_idx'
+            ),
+            models.Index(
+                fields=['current_owner', 'status', '-created_at', '-id'],
+                name='archived_unit_status_idx'
+            ),
+            models.Index(fields=['parent_unit'], name='archived_unit_parent_idx'),
+        ]
 
     def __str__(self) -> str:
         return f"{self.cultivar_name} ({self.id})"
@@ -124,4 +397,158 @@ class User(AbstractUser):
     def __str__(self):
         if self.organization:
             return f"{self.username} ({self.organization.name})"
-        return f"{self.username} (No Org)"
\ No newline at end of file
+        return f"{self.username} (No Org)"
+
+
+class CustodyEvent(models.Model):
+    """ Append-only, hash chained record of what happened to a Unit.
+
+    Each organization has its own chain ordered by `sequence`; `hash`
+    covers the event's fields and the previous event's hash, so editing or
+    removing any row breaks every hash after it.
+    """
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.PROTECT,
+        related_name='custody_events'
+    )
+    sequence = models.PositiveBigIntegerField()
+    unit = models.ForeignKey(
+        Unit,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='custody_events'
+    )
+    event_type = models.CharField(max_length=20, choices=CustodyEventType.choices)
+    from_organization = models.ForeignKey(
+        Organization,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    to_organization = models.ForeignKey(
+        Organization,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    changes = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField()
+    previous_hash = models.CharField(max_length=64)
+    hash = models.CharField(max_length=64, unique=True)
+
+    tenant_field = 'organization'
+    objects = TenantManager()
+
+    class Meta:
+        ordering = ['organization', 'sequence']  # noqa: RUF012
+        constraints = [  # noqa: RUF012
+            models.UniqueConstraint(
+                fields=['organization', 'sequence'],
+                name='custody_event_sequence_uniq'
+            ),
+        ]
+        indexes = [  # noqa: RUF012
+            models.Index(fields=['unit', 'sequence'], name='custody_event_unit_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.event_type} {self.unit_id} (#{self.sequence})"
+
+
+class LedgerCheckpoint(models.Model):
+    """ Merkle root over the custody events verified since the last one """
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.PROTECT,
+        related_name='ledger_checkpoints'
+    )
+    first_sequence = models.PositiveBigIntegerField()
+    last_sequence = models.PositiveBigIntegerField()
+    last_hash = models.CharField(max_length=64)
+    merkle_root = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    tenant_field = 'organization'
+    objects = TenantManager()
+
+    class Meta:
+        ordering = ['organization', '-last_sequence']  # noqa: RUF012
+        constraints = [  # noqa: RUF012
+            models.UniqueConstraint(
+                fields=['organization', 'last_sequence'],
+                name='ledger_checkpoint_sequence_uniq'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.organization_id} #{self.first_sequence}-{self.last_sequence}"
+
+
+class RevokedToken(models.Model):
+    """ Token ids that must no longer be accepted before they expire """
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return self.jti
+
+
+class Job(models.Model):
+    """ Background work queued in the database and run by `run_jobs`.
+
+    Workers claim a queued job by flipping it to RUNNING; `position`
+    counts the input rows already applied, so a job whose worker stopped
+    heartbeating is resumed from there by the next worker.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name='jobs'
+    )
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    kind = models.CharField(max_length=20, choices=JobKind.choices)
+    status = models.CharField(
+        max_length=10,
+        choices=JobStatus.choices,
+        default=JobStatus.QUEUED
+    )
+    file = models.FileField(upload_to='jobs/%Y/%m/', blank=True)
+    params = models.JSONField(default=dict, blank=True)
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    position = models.PositiveIntegerField(default=0)
+    updated_units = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    tenant_field = 'organization'
+    objects = TenantManager()
+
+    class Meta:
+        ordering = ['-created_at']  # noqa: RUF012
+        indexes = [  # noqa: RUF012
+            models.Index(fields=['status', 'created_at'], name='job_status_created_idx'),
+            models.Index(
+                fields=['organization', '-created_at'], name='job_owner_created_idx'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.kind} {self.id} ({self.status})"
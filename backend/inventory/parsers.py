@@ -0,0 +1,32 @@
+"""
+This script defines the request body parsers used by the API
+"""
+import json
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """ Parses newline delimited JSON lazily, one object per line.
+
+    Lines that are not valid JSON are yielded as `ParseError` instances so
+    a single bad row does not abort the rest of the stream.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', 'utf-8')
+        return self._iter_rows(stream, encoding)
+
+    @staticmethod
+    def _iter_rows(stream, encoding):
+        for raw in stream:
+            line = raw.decode(encoding).strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as exc:
+                yield ParseError(f"Invalid JSON: {exc}")
@@ -0,0 +1,70 @@
+"""
+This script routes organization scoped reads to a read replica
+"""
+import contextlib
+import contextvars
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_DB_ALIAS = 'replica'
+PRIMARY_PIN_KEY = 'inventory:primary:{organization_id}'
+
+_replica_reads = contextvars.ContextVar('inventory_replica_reads', default=False)
+
+
+@contextlib.contextmanager
+def replica_reads(organization_id):
+    """ Lets tenant reads in the block use the replica.
+
+    An organization that wrote within DB_REPLICA_LAG_SECONDS is kept on
+    the primary, so its users read their own writes.
+    """
+    if not settings.INVENTORY_READ_REPLICA or is_pinned(organization_id):
+        yield
+        return
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def pin_to_primary(organization_id) -> None:
+    """ Sends the organization's reads to the primary until the replica catches up """
+    if settings.INVENTORY_READ_REPLICA and organization_id:
+        cache.set(
+            PRIMARY_PIN_KEY.format(organization_id=organization_id), True,
+            settings.DB_REPLICA_LAG_SECONDS
+        )
+
+
+def is_pinned(organization_id) -> bool:
+    return bool(cache.get(PRIMARY_PIN_KEY.format(organization_id=organization_id)))
+
+
+class TenantReplicaRouter:
+    """ Reads tenant models from the replica inside `replica_reads`.
+
+    Writes always go to the primary, and so does any read made inside a
+    transaction on it, such as the ledger's sequence lookup.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            _replica_reads.get()
+            and getattr(model, 'tenant_field', None)
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
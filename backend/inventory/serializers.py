@@ -1,14 +1,51 @@
 """
 This script converts the models into JSON for the API
 """
-from typing import Any  # noqa: F401
+import datetime
+from collections.abc import Callable
+from typing import Any
 
-from rest_framework import serializers
+from django.utils.translation import gettext_lazy as _
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 
-from .models import Organization, Unit
+from .authentication import add_organization_claims, revoke_token
+from .models import (
+    ArchivedUnit,
+    CustodyEvent,
+    Job,
+    LabTestStatus,
+    Organization,
+    RevokedToken,
+    Unit,
+    UnitStatus,
+    User,
+)
 
 
-class OrganizationSerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
+    """ Lets clients request a subset of fields with `?fields=id,status`."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+        requested = request.query_params.get('fields')
+        if not requested:
+            return
+        wanted = {name.strip() for name in requested.split(',')}
+        for name in set(self.fields) - wanted:
+            self.fields.pop(name)
+
+
+class OrganizationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Organization
         fields = [  # noqa: RUF012
@@ -19,7 +56,80 @@ class OrganizationSerializer(serializers.ModelSerializer):
 
 
 
-class UnitSerializer(serializers.ModelSerializer):
+class ValuesRowSerializer:
+    """ Read-only fast path that renders `.values()` rows for listings.
+
+    Converters are taken once per request from the ModelSerializer's own
+    fields, so output matches it exactly; columns the database already
+    returns in their JSON form are passed through untouched.
+    """
+    passthrough_fields = (
+        serializers.BooleanField,
+        serializers.CharField,
+        serializers.ChoiceField,
+        serializers.FloatField,
+        serializers.IntegerField,
+    )
+
+    def __init__(self, serializer_class: type, context: dict | None = None) -> None:
+        fields = serializer_class(context=context or {}).fields
+        self.fields = list(fields)
+        self.converters = []
+        for name, field in fields.items():
+            if isinstance(field, serializers.RelatedField):
+                # values() already yields the related primary key
+                pk_field = getattr(field, 'pk_field', None)
+                if pk_field is not None:
+                    self.converters.append((name, pk_field.to_representation))
+            elif not isinstance(field, self.passthrough_fields):
+                self.converters.append((name, self.get_converter(field)))
+
+    @staticmethod
+    def get_converter(field: serializers.Field) -> Callable[[Any], Any]:
+        """ Returns a cheaper equivalent of field.to_representation """
+        if isinstance(field, serializers.UUIDField):
+            if field.uuid_format == 'hex_verbose':
+                return str
+        elif isinstance(field, serializers.DateTimeField):
+            output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+            field_timezone = (
+                field.timezone if hasattr(field, 'timezone')
+                else field.default_timezone()
+            )
+            if (
+                output_format is not None
+                and output_format.lower() == ISO_8601
+                and field_timezone is not None
+            ):
+                # enforce_timezone() resolves the timezone on every call;
+                # resolve it once and keep DRF's 'Z' suffix for UTC
+                def convert_datetime(value):
+                    if value.tzinfo is None:
+                        return field.to_representation(value)
+                    value = value.astimezone(field_timezone).isoformat()
+                    if value.endswith('+00:00'):
+                        value = value[:-6] + 'Z'
+                    return value
+                return convert_datetime
+        elif isinstance(field, serializers.DateField):
+            output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+            if output_format is not None and output_format.lower() == ISO_8601:
+                return datetime.date.isoformat
+        return field.to_representation
+
+    def to_representation(self, rows: list[dict], drop: tuple = ()) -> list[dict]:
+        """ Converts rows in place, removing helper columns in `drop` """
+        for row in rows:
+            for name, convert in self.converters:
+                value = row[name]
+                if value is not None:
+                    row[name] = convert(value)
+            for name in drop:
+                del row[name]
+        return rows
+
+
+class UnitSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Unit
         fields = [  # noqa: RUF012
@@ -35,13 +145,166 @@ class UnitSerializer(serializers.ModelSerializer):
             'storage_location',
             'description',
             'gps_coordinates',
+            'latitude',
+            'longitude',
             'quality_grade',
-            'date_harvested'
+            'date_harvested',
+            'version'
             ]
         read_only_fields = ['id', 'created_at','current_owner']  # noqa: RUF012
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # Parents can only be picked from the caller's own organization
+        parent = self.fields.get('parent_unit')
+        request = self.context.get('request')
+        if isinstance(parent, serializers.RelatedField) and request is not None:
+            parent.queryset = Unit.objects.for_organization(
+                getattr(request.user, 'organization_id', None)
+            )
+
     def validate_weight(self, value: float) -> float:
         """ This validates the weight"""
         if value <= 0:
             raise serializers.ValidationError("Weight must be positive.")
-        return value
\ No newline at end of file
+        return value
+
+    def validate_parent_unit(self, value: Unit | None) -> Unit | None:
+        """ This refuses parents that would make the lineage a cycle"""
+        unit = self.instance
+        if value is None or not isinstance(unit, Unit):
+            return value
+        if value.pk == unit.pk or any(
+            ancestor.pk == unit.pk for ancestor in Unit.objects.ancestors(value)
+        ):
+            raise serializers.ValidationError(
+                "A unit cannot be derived from itself or its own products."
+            )
+        return value
+
+
+class LineageUnitSerializer(UnitSerializer):
+    depth = serializers.IntegerField(read_only=True)
+    archived_at = serializers.DateTimeField(read_only=True)
+
+    class Meta(UnitSerializer.Meta):
+        fields = [*UnitSerializer.Meta.fields, 'archived_at', 'depth']  # noqa: RUF012
+
+
+class ArchivedUnitSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedUnit
+        fields = [  # noqa: RUF012
+            *UnitSerializer.Meta.fields, 'updated_at', 'archived_at'
+        ]
+        read_only_fields = fields
+
+
+# Most units one transition may move, whether chosen by ids or by a filter
+MAX_TRANSITION_UNITS = 10000
+
+
+class UnitTransitionSerializer(serializers.Serializer):
+    """ Validates a bulk status transition request"""
+    ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        required=False,
+        allow_empty=False,
+        max_length=MAX_TRANSITION_UNITS
+    )
+    status = serializers.ChoiceField(choices=UnitStatus.choices, required=False)
+    lab_test_status = serializers.ChoiceField(
+        choices=LabTestStatus.choices,
+        required=False
+    )
+
+    def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
+        """ This requires at least one target status"""
+        if 'status' not in attrs and 'lab_test_status' not in attrs:
+            raise serializers.ValidationError(
+                "Provide a target status and/or lab_test_status."
+            )
+        return attrs
+
+
+class UnitTransferSerializer(serializers.Serializer):
+    """ Validates a custody transfer to another organization"""
+    to_organization = serializers.PrimaryKeyRelatedField(
+        queryset=Organization.objects.filter(is_active=True)
+    )
+
+
+class CustodyEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CustodyEvent
+        fields = [  # noqa: RUF012
+            'sequence', 'unit', 'event_type', 'from_organization',
+            'to_organization', 'changes', 'created_at', 'previous_hash', 'hash'
+        ]
+        read_only_fields = fields
+
+
+class JobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [  # noqa: RUF012
+            'id', 'kind', 'status', 'total_rows', 'position', 'progress',
+            'updated_units', 'error_count', 'errors', 'result', 'attempts',
+            'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
+    def get_progress(self, job: Job) -> float | None:
+        """ Fraction of the input rows applied so far """
+        if not job.total_rows:
+            return 1.0 if job.finished_at else None
+        return round(min(job.position / job.total_rows, 1.0), 4)
+
+
+class LabResultUploadSerializer(serializers.Serializer):
+    """ A CSV with unit_id, lab_test_status and/or quality_grade columns"""
+    file = serializers.FileField()
+
+
+class OrganizationTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """ Issues tokens carrying the user's organization and role """
+
+    @classmethod
+    def get_token(cls, user):
+        return add_organization_claims(super().get_token(user), user)
+
+
+class OrganizationTokenRefreshSerializer(TokenRefreshSerializer):
+    """ Refreshes tokens, re-reading the organization and role claims.
+
+    Revoked refresh tokens are refused, and with BLACKLIST_AFTER_ROTATION
+    the rotated-out refresh token is revoked so it cannot be replayed.
+    """
+
+    def validate(self, attrs: dict[str, Any]) -> dict[str, str]:
+        refresh = self.token_class(attrs['refresh'])
+        if RevokedToken.objects.filter(
+            jti=refresh[jwt_settings.JTI_CLAIM]
+        ).exists():
+            raise InvalidToken(_("Token is revoked"))
+
+        user = User.objects.filter(**{
+            jwt_settings.USER_ID_FIELD: refresh[jwt_settings.USER_ID_CLAIM]
+        }).first()
+        if user is None or not jwt_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                self.error_messages['no_active_account'], 'no_active_account'
+            )
+        add_organization_claims(refresh, user)
+        data = {'access': str(refresh.access_token)}
+
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            if jwt_settings.BLACKLIST_AFTER_ROTATION:
+                revoke_token(refresh)
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
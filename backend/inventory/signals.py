@@ -0,0 +1,42 @@
+"""
+This script invalidates cached reads when inventory rows change and
+instruments database connections as they are opened
+"""
+import functools
+
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import bump_version, organization_scope, unit_scope
+from .instrumentation import record_query
+from .models import Organization, Unit
+from .routers import pin_to_primary
+
+
+def invalidate(scope, organization_id):
+    bump_version(scope)
+    pin_to_primary(organization_id)
+
+
+# Deferred until the write commits, so a read in between cannot cache the
+# old rows under the new version
+@receiver([post_save, post_delete], sender=Unit)
+def invalidate_unit_cache(sender, instance, using, **kwargs):
+    transaction.on_commit(functools.partial(
+        invalidate, unit_scope(instance.current_owner_id), instance.current_owner_id
+    ), using=using)
+
+
+@receiver([post_save, post_delete], sender=Organization)
+def invalidate_organization_cache(sender, instance, using, **kwargs):
+    transaction.on_commit(functools.partial(
+        invalidate, organization_scope(instance.pk), instance.pk
+    ), using=using)
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
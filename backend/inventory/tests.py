@@ -1,3 +1,1125 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.apps import apps
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import revoked_tokens
+from .jobs import claim_job, run_job
+from .models import (
+    ArchivedUnit,
+    CustodyEvent,
+    Job,
+    JobStatus,
+    Organization,
+    RevokedToken,
+    Unit,
+    User,
+)
+from .routers import TenantReplicaRouter, is_pinned, replica_reads
+from .serializers import OrganizationSerializer, UnitSerializer
+from .views import UnitViewSet
+
+
+class InventoryAPITestCase(TestCase):
+    """ Authenticates a grower with a real JWT and seeds their units """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(
+            name='Budget Farms', licence_number='LIC-1'
+        )
+        User.objects.create_user(
+            'grower', password='secret', organization=cls.organization
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        response = self.client.post(
+            '/api/token/', {'username': 'grower', 'password': 'secret'}
+        )
+        self.token = response.data['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        # A steady-state process already knows the token is not revoked
+        revoked_tokens.clear()
+        revoked_tokens.is_revoked(AccessToken(self.token)['jti'])
+
+    def seed_units(self, count):
+        parent = None
+        # Cache invalidation runs on commit, which TestCase never reaches
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(count):
+                parent = Unit.objects.create(
+                    cultivar_name=f'Cultivar {i}',
+                    weight=1 + i,
+                    current_owner=self.organization,
+                    parent_unit=parent,
+                )
+        return parent
+
+    def count_queries(self, method, path, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(path, data, format='json')
+        self.assertLess(response.status_code, 300, response.content)
+        return len(queries)
+
+
+class QueryBudgetTests(InventoryAPITestCase):
+    """ Keeps the query count of each endpoint constant as rows grow """
+
+    def assert_budget(self, method, path_for, budget, data=None):
+        """ Checks the budget with a small and a larger inventory """
+        for count in (3, 30):
+            unit = self.seed_units(count)
+            path = path_for(unit)
+            self.assertEqual(
+                self.count_queries(method, path, data), budget,
+                f"{method.upper()} {path} with {count} more units"
+            )
+
+    def test_list_units(self):
+        self.assert_budget('get', lambda unit: '/api/units/', 1)
+
+    def test_filtered_list_units(self):
+        self.assert_budget(
+            'get', lambda unit: '/api/units/?status=ACTIVE&fields=id,status', 1
+        )
+
+    def test_retrieve_unit(self):
+        self.assert_budget('get', lambda unit: f'/api/units/{unit.id}/', 1)
+
+    def test_create_unit(self):
+        self.assert_budget(
+            'post', lambda unit: '/api/units/', 6,
+            {'cultivar_name': 'New', 'weight': 2, 'date_harvested': '2025-06-01'}
+        )
+
+    def test_unit_lineage(self):
+        self.assert_budget(
+            'get', lambda unit: f'/api/units/{unit.id}/lineage/', 3
+        )
+
+    def test_bulk_create_units(self):
+        rows = [{'cultivar_name': f'Bulk {i}', 'weight': 1} for i in range(50)]
+        self.assert_budget('post', lambda unit: '/api/units/bulk/', 6, rows)
+
+    def test_transition_units(self):
+        self.assert_budget(
+            'post', lambda unit: '/api/units/transition/?status=ACTIVE', 7,
+            {'status': 'TRANSIT'}
+        )
+
+
+class CursorPaginationTests(InventoryAPITestCase):
+    """ Unit pages seek on (created_at, id), even across timestamp ties """
+
+    def follow(self, path, link):
+        """ Returns the pages reached through `link` and their raw cursors """
+        pages, cursors = [], []
+        while path:
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200, response.content)
+            pages.append([row['id'] for row in response.data['results']])
+            path = response.data[link]
+            if path:
+                cursor = parse_qs(urlsplit(path).query)['cursor'][0]
+                cursors.append(base64.b64decode(cursor).decode())
+        return pages, cursors
+
+    def test_follows_next_and_previous_without_offsets(self):
+        self.seed_units(25)
+        tied = Unit.objects.order_by('created_at').values('pk')[5:15]
+        Unit.objects.filter(pk__in=tied).update(created_at=timezone.now())
+        expected = [
+            str(pk) for pk in
+            Unit.objects.order_by('-created_at', '-id').values_list('pk', flat=True)
+        ]
+
+        pages, cursors = self.follow('/api/units/?page_size=4', 'next')
+        self.assertEqual([pk for page in pages for pk in page], expected)
+        self.assertFalse([cursor for cursor in cursors if 'o=' in cursor])
+
+        last_page = pages[-1]
+        cursor = base64.b64encode(cursors[-1].encode()).decode()
+        pages, cursors = self.follow(
+            f'/api/units/?page_size=4&cursor={cursor}', 'previous'
+        )
+        self.assertEqual(pages[0], last_page)
+        self.assertEqual([pk for page in reversed(pages) for pk in page], expected)
+        self.assertFalse([cursor for cursor in cursors if 'o=' in cursor])
+
+    def test_rejects_invalid_positions(self):
+        self.seed_units(3)
+        for position in ('p=nope', 'p=2025-01-01T00:00:00%2B00:00|nope'):
+            cursor = base64.b64encode(position.encode()).decode()
+            response = self.client.get(f'/api/units/?cursor={cursor}')
+            self.assertEqual(response.status_code, 404)
+
+
+class LineageTests(InventoryAPITestCase):
+    """ The parent_unit tree cannot be turned into a cycle """
+
+    def set_parent(self, unit, parent):
+        return self.client.patch(
+            f'/api/units/{unit.id}/', {'parent_unit': str(parent.id)}, format='json'
+        )
+
+    def test_rejects_cycles(self):
+        leaf = self.seed_units(3)
+        root = leaf.parent_unit.parent_unit
+        self.assertEqual(self.set_parent(leaf, leaf).status_code, 400)
+        self.assertEqual(self.set_parent(root, leaf).status_code, 400)
+        self.assertEqual(self.set_parent(leaf, root).status_code, 200)
+        ancestors = self.client.get(
+            f'/api/units/{leaf.id}/lineage/?direction=ancestors'
+        ).data['ancestors']
+        self.assertEqual([unit['id'] for unit in ancestors], [str(root.id)])
+
+
+class BulkCreateTests(InventoryAPITestCase):
+    """ Bulk creation reports invalid rows by their position in the input """
+
+    rows = [{'cultivar_name': f'Bulk {i}', 'weight': 2} for i in range(5)]  # noqa: RUF012
+
+    def test_json_array_across_batches(self):
+        rows = [*self.rows, {'cultivar_name': 'Bad', 'weight': -1}]
+        with mock.patch.object(UnitViewSet, 'bulk_batch_size', 2):
+            response = self.client.post('/api/units/bulk/', rows, format='json')
+        self.assertEqual(response.status_code, 207, response.content)
+        self.assertEqual(response.data['created'], 5)
+        self.assertEqual([error['index'] for error in response.data['errors']], [5])
+        self.assertEqual(Unit.objects.count(), 5)
+
+    def test_ndjson_keeps_rows_after_a_bad_line(self):
+        body = '\n'.join(
+            [json.dumps(self.rows[0]), '{bad', '', json.dumps(self.rows[1])]
+        )
+        response = self.client.post(
+            '/api/units/bulk/', body, content_type='application/x-ndjson'
+        )
+        self.assertEqual(response.status_code, 207, response.content)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1])
+
+    def test_rejected_bodies(self):
+        response = self.client.post(
+            '/api/units/bulk/', [{'cultivar_name': 'Bad', 'weight': -1}], format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['created'], 0)
+        response = self.client.post('/api/units/bulk/', {'a': 1}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Unit.objects.count(), 0)
+
+    def test_date_harvested_defaults_to_today(self):
+        response = self.client.post('/api/units/', self.rows[0], format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        today = timezone.localdate()
+        self.assertEqual(response.data['date_harvested'], today.isoformat())
+        self.client.post('/api/units/bulk/', self.rows[1:], format='json')
+        self.assertEqual(
+            set(Unit.objects.values_list('date_harvested', flat=True)), {today}
+        )
+
+
+class TransitionTests(InventoryAPITestCase):
+    """ Bulk transitions are bounded and written in batches """
+
+    def transition(self, query, status):
+        return self.client.post(
+            f'/api/units/transition/?{query}', {'status': status}, format='json'
+        )
+
+    def test_ids_mode_counts_skipped_units(self):
+        self.seed_units(4)
+        ids = [str(pk) for pk in Unit.objects.values_list('pk', flat=True)]
+        Unit.objects.filter(pk=ids[0]).update(status='ARCHIVED')
+        response = self.client.post(
+            '/api/units/transition/', {'ids': [*ids, ids[1]], 'status': 'TRANSIT'},
+            format='json'
+        )
+        self.assertEqual(response.data, {'updated': 3, 'skipped': 1})
+        self.assertEqual(Unit.objects.get(pk=ids[0]).status, 'ARCHIVED')
+
+        response = self.client.post(
+            '/api/units/transition/?status=TRANSIT',
+            {'status': 'ARCHIVED', 'lab_test_status': 'PASS'}, format='json'
+        )
+        self.assertEqual(response.data, {'updated': 3})
+
+    def test_rejects_requests_without_targets_or_changes(self):
+        unit = self.seed_units(1)
+        response = self.client.post(
+            '/api/units/transition/', {'status': 'TRANSIT'}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            '/api/units/transition/', {'ids': [str(unit.id)]}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Unit.objects.get(pk=unit.pk).status, 'ACTIVE')
+
+    def test_non_filter_params_do_not_select_units(self):
+        self.seed_units(3)
+        for query in ('page_size=1', 'fields=id&cursor=x', 'status=', 'search='):
+            response = self.transition(query, 'DISPOSED')
+            self.assertEqual(response.status_code, 400, query)
+        self.assertFalse(Unit.objects.filter(status='DISPOSED').exists())
+        self.assertEqual(self.transition('search=Cultivar 2', 'DISPOSED').data, {'updated': 1})
+
+    def test_filter_mode_updates_in_batches(self):
+        self.seed_units(5)
+        with mock.patch.object(UnitViewSet, 'bulk_batch_size', 2):
+            response = self.transition('status=ACTIVE', 'TRANSIT')
+        self.assertEqual(response.data, {'updated': 5})
+        self.assertEqual(Unit.objects.filter(status='TRANSIT').count(), 5)
+        self.assertEqual(CustodyEvent.objects.filter(event_type='STATUS').count(), 5)
+        self.assertTrue(self.client.post('/api/ledger/verify/').data['valid'])
+
+    def test_filter_mode_is_capped(self):
+        self.seed_units(5)
+        with mock.patch('inventory.views.MAX_TRANSITION_UNITS', 4):
+            response = self.transition('status=ACTIVE', 'TRANSIT')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Unit.objects.filter(status='TRANSIT').count(), 0)
+
+
+class ExportTests(InventoryAPITestCase):
+    """ Exports stream every matching unit in the requested format """
+
+    def export(self, query):
+        response = self.client.get(f'/api/units/export/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        self.seed_units(3)
+        response, body = self.export('')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('filename="units.csv"', response['Content-Disposition'])
+        lines = body.splitlines()
+        self.assertEqual(lines[0], ','.join(UnitSerializer.Meta.fields))
+        self.assertEqual(len(lines), 4)
+
+    def test_ndjson_with_fields_and_filters(self):
+        leaf = self.seed_units(3)
+        Unit.objects.filter(pk=leaf.pk).update(status='TRANSIT')
+        response, body = self.export(
+            'output=ndjson&fields=id,parent_unit,nope&status=TRANSIT'
+        )
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(
+            [json.loads(line) for line in body.splitlines()],
+            [{'id': str(leaf.id), 'parent_unit': str(leaf.parent_unit_id)}]
+        )
+
+    def test_invalid_params(self):
+        for query in ('output=xml', 'fields=nope', 'status=NOPE'):
+            response = self.client.get(f'/api/units/export/?{query}')
+            self.assertEqual(response.status_code, 400, query)
+
+
+class SummaryTests(InventoryAPITestCase):
+    """ Aggregates are grouped in the database and cached per organization """
+
+    def setUp(self):
+        super().setUp()
+        self.seed_units(4)
+        units = list(Unit.objects.order_by('weight'))
+        Unit.objects.filter(pk=units[0].pk).update(
+            status='TRANSIT', date_harvested='2025-01-15'
+        )
+        Unit.objects.filter(pk__in=[unit.pk for unit in units[1:]]).update(
+            date_harvested='2025-02-10'
+        )
+
+    def test_totals_and_grouping(self):
+        response = self.client.get('/api/units/summary/')
+        self.assertEqual(
+            response.data['results'], [{'total_weight': 10, 'unit_count': 4}]
+        )
+        response = self.client.get('/api/units/summary/?group_by=status&bucket=month')
+        self.assertEqual(
+            [
+                (row['status'], str(row['harvest_period'])[:7],
+                 row['total_weight'], row['unit_count'])
+                for row in response.data['results']
+            ],
+            [('ACTIVE', '2025-02', 9, 3), ('TRANSIT', '2025-01', 1, 1)]
+        )
+
+    def test_invalid_params(self):
+        for query in ('group_by=weight', 'group_by=status,nope', 'bucket=hour'):
+            response = self.client.get(f'/api/units/summary/?{query}')
+            self.assertEqual(response.status_code, 400, query)
+
+    def test_repeated_summary_is_cached(self):
+        path = '/api/units/summary/?group_by=status'
+        uncached = self.count_queries('get', path)
+        # Only the aggregate query is saved; authentication may still query
+        self.assertEqual(self.count_queries('get', path), uncached - 1)
+        self.client.post(
+            '/api/units/bulk/', [{'cultivar_name': 'New', 'weight': 5}],
+            format='json'
+        )
+        response = self.client.get(path)
+        self.assertEqual(
+            [(row['status'], row['unit_count']) for row in response.data['results']],
+            [('ACTIVE', 4), ('TRANSIT', 1)]
+        )
+
+
+class ResponseCacheTests(InventoryAPITestCase):
+    """ Checks cached reads, ETags and write-through invalidation """
+
+    def test_repeated_list_skips_unit_query(self):
+        self.seed_units(3)
+        self.assertEqual(self.count_queries('get', '/api/units/'), 1)
+        self.assertEqual(self.count_queries('get', '/api/units/'), 0)
+
+    def test_if_none_match_returns_not_modified(self):
+        self.seed_units(3)
+        etag = self.client.get('/api/units/')['ETag']
+        response = self.client.get('/api/units/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.client.post(
+            '/api/units/bulk/', [{'cultivar_name': 'New', 'weight': 1}],
+            format='json'
+        )
+        response = self.client.get('/api/units/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 4)
+
+    def test_if_none_match_lists(self):
+        self.seed_units(3)
+        etag = self.client.get('/api/units/')['ETag']
+        for header, expected in (
+            (f'"x", W/{etag}', 304),
+            (f' {etag} ,"y"', 304),
+            ('*', 304),
+            (f'"a{etag[1:-1]}b"', 200),
+            ('"1"', 200),
+        ):
+            response = self.client.get('/api/units/', HTTP_IF_NONE_MATCH=header)
+            self.assertEqual(response.status_code, expected, header)
+
+    def test_writes_invalidate_only_once_committed(self):
+        unit = self.seed_units(1)
+        path = f'/api/units/{unit.id}/'
+        self.client.get(path)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.patch(path, {'status': 'TRANSIT'}, format='json')
+            # Uncommitted: reads keep the version the old rows were cached under
+            self.assertEqual(self.count_queries('get', path), 0)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.client.get(path).data['status'], 'TRANSIT')
+
+
+class AsyncReadTests(InventoryAPITestCase):
+    """ Checks the async read path mirrors the DRF endpoints """
+
+    def async_get(self, path, authenticated=True):
+        headers = {'Authorization': f'Bearer {self.token}'} if authenticated else {}
+        return async_to_sync(AsyncClient().get)(path, headers=headers)
+
+    def collect_ids(self, get, path):
+        ids = []
+        while path:
+            data = get(path).json()
+            ids += [unit['id'] for unit in data['results']]
+            path = data['next']
+        return ids
+
+    def test_unit_pages_match_sync_list(self):
+        self.seed_units(25)
+        self.assertEqual(
+            self.collect_ids(self.async_get, '/api/async/units/?page_size=7'),
+            self.collect_ids(self.client.get, '/api/units/?page_size=7'),
+        )
+
+    def test_requires_token(self):
+        response = self.async_get('/api/async/organization/', authenticated=False)
+        self.assertEqual(response.status_code, 401)
+
+    def test_rejects_invalid_cursors(self):
+        for position in (
+            '2025-01-01T00:00:00+00:00|zzz',
+            f'2025-01-01T00:00:00|{self.seed_units(1).id}',
+        ):
+            cursor = base64.urlsafe_b64encode(position.encode()).decode()
+            response = self.async_get(f'/api/async/units/?cursor={cursor}')
+            self.assertEqual(response.status_code, 404, position)
+
+
+class CustodyLedgerTests(InventoryAPITestCase):
+    """ Checks writes are chained into the ledger and tampering is caught """
+
+    def test_verify_detects_tampering(self):
+        response = self.client.post(
+            '/api/units/bulk/',
+            [{'cultivar_name': f'Bulk {i}', 'weight': 1} for i in range(5)],
+            format='json'
+        )
+        self.assertEqual(response.data['created'], 5)
+        self.client.post(
+            '/api/units/transition/?status=ACTIVE', {'status': 'TRANSIT'},
+            format='json'
+        )
+        result = self.client.post('/api/ledger/verify/').data
+        self.assertEqual((result['valid'], result['verified']), (True, 10))
+
+        CustodyEvent.objects.filter(sequence=3).update(changes={'forged': True})
+        self.client.post(
+            '/api/units/transition/?status=TRANSIT', {'status': 'ARCHIVED'},
+            format='json'
+        )
+        self.assertEqual(self.client.post('/api/ledger/verify/').data['verified'], 5)
+        result = self.client.post('/api/ledger/verify/?full=1').data
+        self.assertEqual(
+            (result['valid'], result['first_invalid_sequence']), (False, 3)
+        )
+
+
+class ValuesRowSerializerTests(InventoryAPITestCase):
+    """ Checks the `.values()` list path renders exactly like the serializers """
+
+    def test_unit_list_matches_unit_serializer(self):
+        child = self.seed_units(3)
+        child.description = 'Trimmed \u2028 leaf'
+        child.save()
+        rendered = self.client.get('/api/units/').content
+        expected = JSONRenderer().render(
+            {'results': UnitSerializer(Unit.objects.all(), many=True).data}
+        )
+        self.assertEqual(
+            json.loads(rendered)['results'], json.loads(expected)['results']
+        )
+
+    def test_organization_list_matches_serializer(self):
+        Organization.objects.create(name='Elsewhere', licence_number='LIC-9')
+        expected = OrganizationSerializer([self.organization], many=True)
+        self.assertEqual(
+            json.loads(self.client.get('/api/organization/').content),
+            json.loads(JSONRenderer().render(expected.data)),
+        )
+
+
+class InstrumentationTests(InventoryAPITestCase):
+    """ Per-request timings, the metrics endpoint and slow query logging """
+
+    def test_server_timing_reports_queries(self):
+        self.seed_units(3)
+        response = self.client.get('/api/units/')
+        timing = response['Server-Timing']
+        self.assertIn('desc="1 queries"', timing)
+        for phase in ('db;', 'auth;', 'serialize;', 'total;'):
+            self.assertIn(phase, timing)
+
+    def test_metrics_histograms_per_route(self):
+        self.client.get('/api/units/')
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn(
+            'inventory_requests_total{route="unit-list",method="GET",status="200"}',
+            body
+        )
+        self.assertIn(
+            'inventory_request_queries_bucket{route="unit-list",method="GET",le="2"}',
+            body
+        )
+
+    @override_settings(METRICS_TOKEN='scrape')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.client.credentials()
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_slow_queries_logged(self):
+        with self.assertLogs('inventory.slow_queries', 'WARNING') as logs:
+            self.client.get('/api/units/')
+        self.assertIn('inventory_unit', logs.output[-1])
+
+
+class StatelessAuthTests(InventoryAPITestCase):
+    """ Token claims replace the user lookup; revocation still applies """
+
+    def test_reads_need_no_auth_query(self):
+        self.assertEqual(self.count_queries('get', '/api/units/'), 1)
+        self.assertEqual(self.count_queries('get', '/api/units/'), 0)
+
+    @override_settings(INVENTORY_STATELESS_AUTH=False)
+    def test_stateful_mode_loads_user(self):
+        self.assertEqual(self.count_queries('get', '/api/units/'), 2)
+
+    def test_revoked_token_refused(self):
+        response = self.client.post('/api/token/revoke/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.client.get('/api/units/').status_code, 401)
+
+        # Other processes refuse it once their cached answer expires
+        revoked_tokens.clear()
+        self.assertEqual(self.client.get('/api/units/').status_code, 401)
+
+    def test_rotated_refresh_token_cannot_be_reused(self):
+        self.client.credentials()
+        refresh = self.client.post(
+            '/api/token/', {'username': 'grower', 'password': 'secret'}
+        ).data['refresh']
+        response = self.client.post('/api/token/refresh/', {'refresh': refresh})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            AccessToken(response.data['access'])['organization_id'],
+            str(self.organization.id)
+        )
+        response = self.client.post('/api/token/refresh/', {'refresh': refresh})
+        self.assertEqual(response.status_code, 401)
+
+
+class UnitFilterTests(InventoryAPITestCase):
+    """ Choice, date and search filters with sparse fieldsets """
+
+    def test_status_filter_with_sparse_fields(self):
+        unit = self.seed_units(12)
+        Unit.objects.filter(pk=unit.pk).update(status='TRANSIT')
+        response = self.client.get('/api/units/?status=TRANSIT&fields=id,status')
+        self.assertEqual(
+            response.json()['results'], [{'id': str(unit.id), 'status': 'TRANSIT'}]
+        )
+        response = self.client.get('/api/units/?status=ACTIVE,TRANSIT&fields=id')
+        self.assertEqual(len(response.json()['results']), 12)
+
+    def test_search(self):
+        self.seed_units(12)
+        response = self.client.get('/api/units/?search=Cultivar 1&fields=cultivar_name')
+        self.assertEqual(
+            sorted(unit['cultivar_name'] for unit in response.json()['results']),
+            ['Cultivar 1', 'Cultivar 10', 'Cultivar 11']
+        )
+
+    def test_invalid_filter_params(self):
+        for query in ('status=NOPE', 'status=ACTIVE,NOPE',
+                      'date_harvested_after=2025-13-01',
+                      'date_harvested_before=yesterday'):
+            response = self.client.get(f'/api/units/?{query}')
+            self.assertEqual(response.status_code, 400, query)
+
+
+class LocationFilterTests(InventoryAPITestCase):
+    """ Bounding box and radius lookups on the parsed coordinates """
+
+    def setUp(self):
+        super().setUp()
+        locations = {
+            'Phoenix': '33.4484, -112.0740',
+            'Tempe': '33.4255, -111.9400',
+            'Tucson': '32.2226, -110.9747',
+            'Fiji': '-17.7134, 178.0650',
+            'Samoa': '-13.7590, -172.1046',
+        }
+        for name, gps in locations.items():
+            Unit.objects.create(
+                cultivar_name=name, weight=1, gps_coordinates=gps,
+                current_owner=self.organization
+            )
+        Unit.objects.create(
+            cultivar_name='Vault', weight=1, current_owner=self.organization,
+            storage_location='Vault 7'
+        )
+
+    def names(self, query):
+        response = self.client.get(f'/api/units/?{query}')
+        self.assertEqual(response.status_code, 200, response.content)
+        return sorted(unit['cultivar_name'] for unit in response.json()['results'])
+
+    def test_coordinates_parsed_on_save(self):
+        unit = Unit.objects.get(cultivar_name='Phoenix')
+        self.assertEqual((unit.latitude, unit.longitude), (33.4484, -112.074))
+        self.assertEqual(unit.geohash[:5], '9tbq3')
+        self.assertIsNone(Unit.objects.get(cultivar_name='Vault').latitude)
+
+    def test_bbox(self):
+        self.assertEqual(self.names('bbox=33,-112.5,34,-111.5'), ['Phoenix', 'Tempe'])
+        # West greater than east crosses the antimeridian
+        self.assertEqual(self.names('bbox=-20,170,-10,-170'), ['Fiji', 'Samoa'])
+
+    def test_radius(self):
+        self.assertEqual(
+            self.names('near=33.4484,-112.0740&radius_km=15'), ['Phoenix', 'Tempe']
+        )
+        self.assertEqual(
+            self.names('near=33.4484,-112.0740&radius_km=200'),
+            ['Phoenix', 'Tempe', 'Tucson']
+        )
+
+    def test_invalid_location_params(self):
+        for query in ('bbox=1,2,3', 'bbox=40,0,30,10', 'near=33,-112',
+                      'near=north&radius_km=5'):
+            response = self.client.get(f'/api/units/?{query}')
+            self.assertEqual(response.status_code, 400, query)
+
+
+class JobQueueTests(InventoryAPITestCase):
+    """ Lab result imports through the database-backed job queue """
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        self.enterContext(override_settings(MEDIA_ROOT=media, JOB_CHUNK_SIZE=2))
+        self.units = [
+            Unit.objects.create(
+                cultivar_name=f'Lab {i}', weight=1, current_owner=self.organization
+            )
+            for i in range(3)
+        ]
+
+    def upload(self, rows):
+        body = 'unit_id,lab_test_status,quality_grade\n' + ''.join(
+            f'{row}\n' for row in rows
+        )
+        response = self.client.post('/api/units/lab-results/', {
+            'file': SimpleUploadedFile('results.csv', body.encode())
+        }, format='multipart')
+        self.assertEqual(response.status_code, 202, response.content)
+        return response
+
+    def test_import_applies_results_in_chunks(self):
+        first, second, third = self.units
+        Unit.objects.filter(pk=third.pk).update(lab_test_status='PASS')
+        response = self.upload([
+            f'{first.id},PASS,A',
+            f'{second.id},,B',
+            f'{third.id},FAIL,',
+            f'{Unit().id},PASS,',
+            'not-a-uuid,PASS,',
+        ])
+        self.assertEqual(response.data['status'], JobStatus.QUEUED)
+
+        call_command('run_jobs', '--once', stdout=io.StringIO())
+        job = self.client.get(response['Location']).data
+        self.assertEqual(job['status'], JobStatus.SUCCEEDED)
+        self.assertEqual((job['total_rows'], job['position']), (5, 5))
+        self.assertEqual((job['progress'], job['updated_units']), (1.0, 2))
+        self.assertEqual(
+            [(error['line'], error['error']) for error in job['errors']], [
+                (4, "Cannot move lab_test_status from PASS to FAIL."),
+                (5, "Unknown unit."),
+                (6, "Invalid unit_id."),
+            ]
+        )
+        first.refresh_from_db()
+        self.assertEqual((first.lab_test_status, first.quality_grade), ('PASS', 'A'))
+        self.assertEqual(Unit.objects.get(pk=second.pk).quality_grade, 'B')
+        self.assertTrue(CustodyEvent.objects.filter(
+            unit=first, changes={'lab_test_status': ['PENDING', 'PASS']}
+        ).exists())
+
+    def test_job_claimed_once_and_stale_job_resumed(self):
+        self.upload([f'{unit.id},,A' for unit in self.units])
+        job = claim_job('worker-1')
+        self.assertIsNotNone(job)
+        self.assertIsNone(claim_job('worker-2'))
+
+        # worker-1 dies after the first chunk
+        Job.objects.filter(pk=job.pk).update(
+            position=2, heartbeat_at=timezone.now() - timedelta(hours=1)
+        )
+        resumed = claim_job('worker-2')
+        self.assertEqual((resumed.pk, resumed.position), (job.pk, 2))
+        run_job(resumed)
+        self.assertEqual(Job.objects.get(pk=job.pk).updated_units, 1)
+
+        # The original worker notices and stops without touching the job
+        with self.assertLogs('inventory.jobs', 'WARNING'):
+            run_job(job)
+        job = Job.objects.get(pk=job.pk)
+        self.assertEqual((job.status, job.updated_units), (JobStatus.SUCCEEDED, 1))
+
+    def test_background_ledger_verification(self):
+        response = self.client.post('/api/ledger/verify/?background=1')
+        self.assertEqual(response.status_code, 202)
+        run_job(claim_job('worker'))
+        job = self.client.get(response['Location']).data
+        self.assertEqual(job['status'], JobStatus.SUCCEEDED)
+        self.assertTrue(job['result']['valid'])
+
+    @mock.patch('inventory.ledger.VERIFY_CHUNK_SIZE', 2)
+    def test_ledger_verification_heartbeats(self):
+        self.client.post(
+            '/api/units/bulk/', [{'cultivar_name': 'Bulk', 'weight': 1}] * 5,
+            format='json'
+        )
+        self.client.post('/api/ledger/verify/?background=1&full=1')
+        job = claim_job('worker')
+        stale = timezone.now() - timedelta(hours=1)
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=stale)
+        self.assertEqual(run_job(job).status, JobStatus.SUCCEEDED)
+        job.refresh_from_db()
+        self.assertGreater(job.heartbeat_at, stale)
+
+        # A worker whose job was resumed elsewhere stops at its next beat
+        self.client.post('/api/ledger/verify/?background=1&full=1')
+        job = claim_job('worker')
+        Job.objects.filter(pk=job.pk).update(worker='other')
+        self.assertEqual(run_job(job).status, JobStatus.RUNNING)
+
+
+class OptimisticConcurrencyTests(InventoryAPITestCase):
+    """ If-Match versions on unit writes, without row locks """
+
+    def setUp(self):
+        super().setUp()
+        self.unit = self.seed_units(1)
+        self.path = f'/api/units/{self.unit.id}/'
+
+    def test_etag_tracks_version(self):
+        response = self.client.get(self.path)
+        self.assertEqual((response['ETag'], response.data['version']), ('"1"', 1))
+        response = self.client.get(self.path, HTTP_IF_NONE_MATCH='"1"')
+        self.assertEqual(response.status_code, 304)
+
+    def test_sparse_fieldsets_have_their_own_etag(self):
+        full = self.client.get(self.path)['ETag']
+        sparse = self.client.get(f'{self.path}?fields=id')['ETag']
+        self.assertNotEqual(sparse, full)
+        self.assertEqual(
+            self.client.get(f'{self.path}?fields=status,id')['ETag'],
+            self.client.get(f'{self.path}?fields=id,status')['ETag'],
+        )
+        response = self.client.get(f'{self.path}?fields=id', HTTP_IF_NONE_MATCH=full)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'id': str(self.unit.id)})
+        response = self.client.get(f'{self.path}?fields=id', HTTP_IF_NONE_MATCH=sparse)
+        self.assertEqual(response.status_code, 304)
+
+        # Either tag names the version a write is based on
+        response = self.client.patch(
+            self.path, {'status': 'TRANSIT'}, format='json', HTTP_IF_MATCH=sparse
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_stale_if_match_is_rejected(self):
+        response = self.client.patch(
+            self.path, {'status': 'TRANSIT'}, format='json', HTTP_IF_MATCH='"1"'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response['ETag'], response.data['version']), ('"2"', 2))
+
+        response = self.client.patch(
+            self.path, {'description': 'late'}, format='json', HTTP_IF_MATCH='"1"'
+        )
+        self.assertEqual(response.status_code, 412)
+        self.unit.refresh_from_db()
+        self.assertEqual((self.unit.status, self.unit.description), ('TRANSIT', None))
+        self.assertEqual(self.client.get(self.path)['ETag'], '"2"')
+
+    def test_deleting_the_parent_changes_the_version(self):
+        child = Unit.objects.create(
+            cultivar_name='Child', weight=1, current_owner=self.organization,
+            parent_unit=self.unit
+        )
+        etag = self.client.get(f'/api/units/{child.id}/')['ETag']
+        self.client.delete(self.path)
+
+        response = self.client.patch(
+            f'/api/units/{child.id}/', {'description': 'late'}, format='json',
+            HTTP_IF_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 412)
+        child.refresh_from_db()
+        self.assertEqual((child.parent_unit, child.version), (None, 2))
+
+    def test_single_conditional_update_of_changed_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.patch(
+                self.path, {'status': 'TRANSIT', 'weight': self.unit.weight},
+                format='json'
+            )
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"status"', updates[0])
+        self.assertNotIn('"weight"', updates[0])
+        self.assertIn('"version" = 1', updates[0])
+
+    def test_bulk_writes_bump_version(self):
+        self.client.post(
+            '/api/units/transition/', {'ids': [str(self.unit.id)], 'status': 'TRANSIT'},
+            format='json'
+        )
+        self.unit.refresh_from_db()
+        self.assertEqual(self.unit.version, 2)
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class DeltaSyncTests(InventoryAPITestCase):
+    """ The changes feed returns only what changed since a cursor """
+
+    def sync(self, cursor=None, page_size=100):
+        params = {'page_size': page_size}
+        if cursor:
+            params['cursor'] = cursor
+        response = self.client.get('/api/units/changes/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data
+
+    def create(self, name):
+        response = self.client.post('/api/units/', {
+            'cultivar_name': name, 'weight': 1, 'date_harvested': '2025-06-01'
+        }, format='json')
+        return response.data['id']
+
+    def test_initial_sync_pages_through_everything(self):
+        for i in range(5):
+            self.create(f'Unit {i}')
+        first = self.sync(page_size=3)
+        self.assertTrue(first['has_more'])
+        second = self.sync(first['cursor'], page_size=3)
+        self.assertFalse(second['has_more'])
+        names = [unit['cultivar_name'] for unit in first['changes'] + second['changes']]
+        self.assertEqual(names, [f'Unit {i}' for i in range(5)])
+        self.assertEqual(self.sync(second['cursor'])['changes'], [])
+
+    def test_deltas_and_tombstones(self):
+        kept, edited, removed, moved = (self.create(name) for name in 'abcd')
+        cursor = self.sync()['cursor']
+
+        self.client.patch(f'/api/units/{edited}/', {'status': 'TRANSIT'}, format='json')
+        self.client.delete(f'/api/units/{removed}/')
+        other = Organization.objects.create(name='Buyer', licence_number='LIC-2')
+        self.client.post(
+            f'/api/units/{moved}/transfer/', {'to_organization': str(other.id)},
+            format='json'
+        )
+        added = self.create('e')
+
+        delta = self.sync(cursor)
+        self.assertEqual(
+            [unit['id'] for unit in delta['changes']], [edited, added]
+        )
+        self.assertEqual(
+            sorted(str(unit) for unit in delta['deleted']), sorted([removed, moved])
+        )
+        self.assertNotIn(kept, [unit['id'] for unit in delta['changes']])
+
+        empty = self.sync(delta['cursor'])
+        self.assertEqual((empty['changes'], empty['deleted']), ([], []))
+
+    def test_deleting_a_parent_reports_its_children(self):
+        child = self.seed_units(2)
+        cursor = self.sync()['cursor']
+        self.client.delete(f'/api/units/{child.parent_unit_id}/')
+
+        delta = self.sync(cursor)
+        self.assertEqual(
+            [(unit['id'], unit['parent_unit']) for unit in delta['changes']],
+            [(str(child.id), None)]
+        )
+        self.assertEqual(delta['deleted'], [child.parent_unit_id])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/units/changes/?cursor=nope')
+        self.assertEqual(response.status_code, 400)
+        for unit_id in ('zzz', None):
+            cursor = base64.urlsafe_b64encode(json.dumps({
+                'updated_at': '2025-01-01T00:00:00+00:00', 'id': unit_id,
+                'sequence': 0,
+            }).encode()).decode()
+            response = self.client.get('/api/units/changes/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 400, unit_id)
+
+
+class ArchiveTests(InventoryAPITestCase):
+    """ Old closed units move to the archive and stay readable """
+
+    def setUp(self):
+        super().setUp()
+        self.harvest = Unit.objects.create(
+            cultivar_name='Harvest', weight=10, current_owner=self.organization,
+            status='ARCHIVED'
+        )
+        self.disposed = Unit.objects.create(
+            cultivar_name='Disposed', weight=1, current_owner=self.organization,
+            status='DISPOSED'
+        )
+        self.recent = Unit.objects.create(
+            cultivar_name='Recent', weight=1, current_owner=self.organization,
+            status='ARCHIVED'
+        )
+        self.product = Unit.objects.create(
+            cultivar_name='Product', weight=5, current_owner=self.organization,
+            parent_unit=self.harvest
+        )
+        old = timezone.now() - timedelta(days=365)
+        Unit.objects.filter(
+            pk__in=[self.harvest.pk, self.disposed.pk, self.product.pk]
+        ).update(updated_at=old)
+
+    def archive(self, **options):
+        call_command('archive_units', batch_size=1, stdout=io.StringIO(), **options)
+
+    def test_moves_only_old_closed_units_and_resumes(self):
+        self.archive(max_batches=1)
+        self.assertEqual(ArchivedUnit.objects.count(), 1)
+        self.archive()
+        self.assertEqual(
+            set(ArchivedUnit.objects.values_list('id', flat=True)),
+            {self.harvest.pk, self.disposed.pk}
+        )
+        self.assertEqual(
+            set(Unit.objects.values_list('id', flat=True)),
+            {self.recent.pk, self.product.pk}
+        )
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.parent_unit_id, self.harvest.pk)
+        self.assertEqual(
+            CustodyEvent.objects.filter(event_type='ARCHIVED').count(), 2
+        )
+        self.assertTrue(self.client.post('/api/ledger/verify/').data['valid'])
+
+    def test_archived_units_stay_readable(self):
+        self.archive()
+        listed = self.client.get('/api/archived-units/?status=ARCHIVED').data
+        self.assertEqual(
+            [unit['id'] for unit in listed['results']], [str(self.harvest.pk)]
+        )
+        live = self.client.get('/api/units/').data['results']
+        self.assertNotIn(str(self.harvest.pk), [unit['id'] for unit in live])
+
+        ancestors = self.client.get(
+            f'/api/units/{self.product.pk}/lineage/?direction=ancestors'
+        ).data['ancestors']
+        self.assertEqual([unit['id'] for unit in ancestors], [str(self.harvest.pk)])
+        self.assertIsNotNone(ancestors[0]['archived_at'])
+
+        descendants = self.client.get(
+            f'/api/archived-units/{self.harvest.pk}/lineage/'
+        ).data['descendants']
+        self.assertEqual([unit['id'] for unit in descendants], [str(self.product.pk)])
+        self.assertIsNone(descendants[0]['archived_at'])
+
+    def test_archiving_invalidates_cached_unit_reads(self):
+        cached = self.client.get('/api/units/').data['results']
+        self.assertIn(str(self.harvest.pk), [unit['id'] for unit in cached])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.archive()
+        live = self.client.get('/api/units/').data['results']
+        self.assertNotIn(str(self.harvest.pk), [unit['id'] for unit in live])
+
+
+class TenantScopingTests(InventoryAPITestCase):
+    """ Every endpoint only sees the user's organization """
+
+    def setUp(self):
+        super().setUp()
+        self.other = Organization.objects.create(name='Other', licence_number='LIC-2')
+        self.foreign = Unit.objects.create(
+            cultivar_name='Foreign', weight=1, current_owner=self.other
+        )
+
+    def test_organizations_are_scoped(self):
+        listed = self.client.get('/api/organization/').data
+        self.assertEqual([org['id'] for org in listed], [str(self.organization.pk)])
+        self.assertEqual(
+            self.client.get(f'/api/organization/{self.other.pk}/').status_code, 404
+        )
+        own = f'/api/organization/{self.organization.pk}/'
+        self.assertEqual(
+            self.client.post(
+                '/api/organization/', {'name': 'New', 'licence_number': 'LIC-3'},
+                format='json'
+            ).status_code,
+            405
+        )
+        self.assertEqual(
+            self.client.patch(own, {'name': 'Mine'}, format='json').status_code, 405
+        )
+        self.assertEqual(self.client.delete(own).status_code, 405)
+        response = async_to_sync(AsyncClient().get)(
+            f'/api/async/organization/{self.other.pk}/',
+            headers={'Authorization': f'Bearer {self.token}'}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_units_are_scoped(self):
+        self.assertEqual(
+            self.client.get(f'/api/units/{self.foreign.pk}/').status_code, 404
+        )
+        response = self.client.post('/api/units/', {
+            'cultivar_name': 'Mine', 'weight': 1, 'parent_unit': str(self.foreign.pk)
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('parent_unit', response.data)
+        self.assertEqual(
+            list(Unit.objects.for_organization(None)), []
+        )
+
+    def test_tenant_models_lead_an_index_with_their_organization(self):
+        for model in apps.get_app_config('inventory').get_models():
+            field = getattr(model, 'tenant_field', 'pk')
+            if field == 'pk':
+                continue
+            leading = {
+                index.fields[0].lstrip('-') for index in model._meta.indexes
+            } | {
+                constraint.fields[0] for constraint in model._meta.constraints
+                if getattr(constraint, 'fields', None)
+            }
+            self.assertIn(field, leading, model.__name__)
+
+    @override_settings(INVENTORY_READ_REPLICA=True)
+    def test_writes_pin_the_organization_to_the_primary(self):
+        self.assertFalse(is_pinned(self.organization.pk))
+        self.client.get('/api/units/')
+        self.assertFalse(is_pinned(self.organization.pk))
+        self.client.post('/api/units/', {
+            'cultivar_name': 'New', 'weight': 2, 'date_harvested': '2025-06-01'
+        }, format='json')
+        self.assertTrue(is_pinned(self.organization.pk))
+        self.assertFalse(is_pinned(self.other.pk))
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    """ Tenant reads go to the replica only when the request allows it """
+
+    def setUp(self):
+        cache.clear()
+        self.router = TenantReplicaRouter()
+
+    @override_settings(INVENTORY_READ_REPLICA=True)
+    def test_routes_tenant_reads(self):
+        self.assertEqual(self.router.db_for_read(Unit), 'default')
+        with replica_reads('org'):
+            self.assertEqual(self.router.db_for_read(Unit), 'replica')
+            self.assertEqual(self.router.db_for_read(RevokedToken), 'default')
+            self.assertEqual(self.router.db_for_write(Unit), 'default')
+        self.assertFalse(self.router.allow_migrate('replica', 'inventory'))
+
+    @override_settings(INVENTORY_READ_REPLICA=True, DB_REPLICA_LAG_SECONDS=60)
+    def test_pinned_organizations_read_the_primary(self):
+        cache.set('inventory:primary:org', True)
+        with replica_reads('org'):
+            self.assertEqual(self.router.db_for_read(Unit), 'default')
+
+    def test_disabled_without_a_replica(self):
+        with replica_reads('org'):
+            self.assertEqual(self.router.db_for_read(Unit), 'default')
@@ -4,12 +4,39 @@ URL configuration for Inventory app
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import OrganizationViewSet, UnitViewSet
+from . import async_views
+from .views import (
+    ArchivedUnitViewSet,
+    CustodyEventViewSet,
+    JobViewSet,
+    OrganizationViewSet,
+    UnitViewSet,
+)
 
 router = DefaultRouter()
-router.register(r'units', UnitViewSet)
-router.register(r'organization', OrganizationViewSet)
+router.register(r'units', UnitViewSet, basename='unit')
+router.register(r'archived-units', ArchivedUnitViewSet, basename='archived-unit')
+router.register(r'organization', OrganizationViewSet, basename='organization')
+router.register(r'ledger', CustodyEventViewSet, basename='custody-event')
+router.register(r'jobs', JobViewSet, basename='job')
+
+# Async read-only mirrors of the list/retrieve routes for ASGI deployments
+async_urlpatterns = [
+    path('units/', async_views.unit_list, name='async-unit-list'),
+    path('units/<uuid:pk>/', async_views.unit_detail, name='async-unit-detail'),
+    path(
+        'organization/',
+        async_views.organization_list,
+        name='async-organization-list'
+    ),
+    path(
+        'organization/<uuid:pk>/',
+        async_views.organization_detail,
+        name='async-organization-detail'
+    ),
+]
 
 urlpatterns = [
+    path('async/', include(async_urlpatterns)),
     path('', include(router.urls))
-]
\ No newline at end of file
+]
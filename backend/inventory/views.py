@@ -1,34 +1,797 @@
-from rest_framework import exceptions, permissions, viewsets
+import contextlib
+import functools
+import hashlib
+import uuid
+from collections.abc import Iterator
+from datetime import timedelta
+from itertools import islice
 
-from .models import Organization, Unit
-from .serializers import OrganizationSerializer, UnitSerializer
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek, TruncYear
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import exceptions, filters, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 
+from .authentication import revoke_token
+from .caching import (
+    CachedReadMixin,
+    bump_version,
+    organization_scope,
+    unit_scope,
+)
+from .exports import EXPORTERS
+from .filters import UnitFilterBackend
+from .instrumentation import timed
+from .ledger import record_events, verify_chain
+from .models import (
+    LAB_TEST_STATUS_TRANSITIONS,
+    UNIT_STATUS_TRANSITIONS,
+    ArchivedUnit,
+    CustodyEvent,
+    CustodyEventType,
+    Job,
+    JobKind,
+    Organization,
+    Unit,
+    allowed_sources,
+)
+from .pagination import (
+    CustodyEventCursorPagination,
+    JobCursorPagination,
+    UnitCursorPagination,
+    decode_sync_cursor,
+    encode_sync_cursor,
+)
+from .parsers import NDJSONParser
+from .routers import pin_to_primary, replica_reads
+from .serializers import (
+    MAX_TRANSITION_UNITS,
+    ArchivedUnitSerializer,
+    CustodyEventSerializer,
+    JobSerializer,
+    LabResultUploadSerializer,
+    LineageUnitSerializer,
+    OrganizationSerializer,
+    UnitSerializer,
+    UnitTransferSerializer,
+    UnitTransitionSerializer,
+    ValuesRowSerializer,
+)
 
-class OrganizationViewSet(viewsets.ModelViewSet):
-    """ Read-only viewset for Organizations."""
-    queryset = Organization.objects.all()
+# Unit fields whose changes are written to the custody ledger
+LEDGER_TRACKED_FIELDS = ('status', 'lab_test_status')
+
+
+class PreconditionFailed(exceptions.APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "The unit was changed since it was read."
+    default_code = 'precondition_failed'
+
+
+def unit_etag(version: int, fields: str | None = None) -> str:
+    """ ETag of a Unit at `version`; sparse fieldsets get a tag of their own """
+    if not fields:
+        return f'"{version}"'
+    names = ','.join(sorted({name.strip() for name in fields.split(',')}))
+    digest = hashlib.md5(names.encode(), usedforsecurity=False).hexdigest()[:8]
+    return f'"{version}-{digest}"'
+
+
+def job_accepted(request, job):
+    """Answers 202 with the queued job and where to poll its status"""
+    location = reverse('job-detail', args=[job.pk], request=request)
+    return Response(
+        JobSerializer(job).data,
+        status=status.HTTP_202_ACCEPTED,
+        headers={'Location': location}
+    )
+
+
+class ValuesListMixin:
+    """ Lists rows straight from `.values()` without model instances """
+
+    def list(self, request, *args, **kwargs):
+        rows = ValuesRowSerializer(
+            self.get_serializer_class(), context=self.get_serializer_context()
+        )
+        # The cursor paginator reads its ordering columns from each row
+        ordering = getattr(self.paginator, 'ordering', None) or ()
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        extra = [
+            name.lstrip('-') for name in ordering
+            if name.lstrip('-') not in rows.fields
+        ]
+        if not rows.fields and not extra:
+            extra = ['pk']
+        queryset = self.filter_queryset(self.get_queryset()).values(
+            *rows.fields, *extra
+        )
+
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            page = list(queryset)
+            with timed('serialize'):
+                return Response(rows.to_representation(page, drop=extra))
+        # Links are built from the raw values before rows are converted
+        response = self.get_paginated_response(page)
+        with timed('serialize'):
+            rows.to_representation(page, drop=extra)
+        return response
+
+
+class OrganizationScopedMixin:
+    """ Limits a viewset to the rows of the user's organization.
+
+    Querysets start from the model's `for_organization`, and GET requests
+    read from the replica when one is configured. A successful write pins
+    the organization to the primary until the replica has caught up.
+    """
+    model = None
+
+    def get_tenant_id(self):
+        return getattr(self.request.user, 'organization_id', None)
+
+    def get_queryset(self):
+        return self.model.objects.for_organization(self.get_tenant_id())
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in permissions.SAFE_METHODS:
+            self.reads = contextlib.ExitStack()
+            self.reads.enter_context(replica_reads(self.get_tenant_id()))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if reads := getattr(self, 'reads', None):
+            reads.close()
+        elif (
+            request.method not in permissions.SAFE_METHODS
+            and response.status_code < status.HTTP_400_BAD_REQUEST
+        ):
+            pin_to_primary(self.get_tenant_id())
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class LineageMixin:
+    """ Adds the lineage of the viewset's Unit (live or archived) """
+
+    @action(detail=True, methods=['get'])
+    def lineage(self, request, pk=None):
+        """Returns a Unit's ancestors and descendants in one query each.
+
+        Use `?direction=ancestors` or `?direction=descendants` to fetch only
+        one side of the tree. Archived units are included and carry their
+        `archived_at`.
+        """
+        unit = self.get_object()
+        direction = request.query_params.get('direction')
+        if direction not in (None, 'ancestors', 'descendants'):
+            raise exceptions.ValidationError(
+                {'direction': "Must be 'ancestors' or 'descendants'."}
+            )
+
+        context = self.get_serializer_context()
+        result = {}
+        for side in ('ancestors', 'descendants'):
+            if direction in (None, side):
+                units = getattr(Unit.objects, side)(unit)
+                result[side] = LineageUnitSerializer(
+                    units, many=True, context=context
+                ).data
+        return Response(result)
+
+
+class OrganizationViewSet(
+    OrganizationScopedMixin,
+    CachedReadMixin,
+    ValuesListMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
+    """ Read-only viewset for the user's own Organization."""
+    model = Organization
     serializer_class = OrganizationSerializer
     permission_classes = [permissions.IsAuthenticated]  # noqa: RUF012
-    
 
-class UnitViewSet(viewsets.ModelViewSet):
+    def get_cache_scope(self):
+        organization_id = self.get_tenant_id()
+        return organization_scope(organization_id) if organization_id else None
+
+
+class UnitViewSet(
+    OrganizationScopedMixin,
+    CachedReadMixin,
+    ValuesListMixin,
+    LineageMixin,
+    viewsets.ModelViewSet,
+):
     """ CRUD viewset for Units. """
-    # queryset = Unit.objects.all()
+    model = Unit
     serializer_class = UnitSerializer
     permission_classes = [permissions.IsAuthenticated]  # noqa: RUF012
+    pagination_class = UnitCursorPagination
+    filter_backends = [UnitFilterBackend, filters.SearchFilter]  # noqa: RUF012
+    search_fields = ['cultivar_name', 'storage_location']  # noqa: RUF012
+    bulk_batch_size = 500
+    summary_group_fields = (
+        'cultivar_name', 'unit_type', 'status', 'lab_test_status', 'quality_grade'
+    )
+    summary_buckets = {  # noqa: RUF012
+        'day': TruncDay,
+        'week': TruncWeek,
+        'month': TruncMonth,
+        'year': TruncYear,
+    }
 
-    def get_queryset(self):
-        """Filters users to only see their own units"""
-        user = self.request.users
-        if hasattr(user, 'organization') and user.organization:
-            return Unit.objects.filter(current_owner=user.organization)
-        return Unit.objects.none()
+    def get_cache_scope(self):
+        organization_id = self.get_tenant_id()
+        return unit_scope(organization_id) if organization_id else None
+
+    def get_organization_id(self):
+        """Returns the user's organization id or refuses the request"""
+        organization_id = self.get_tenant_id()
+        if not organization_id:
+            raise exceptions.PermissionDenied(
+                "User must belong to an Organization to create units."
+            )
+        return organization_id
 
+    @transaction.atomic
     def perform_create(self, serializer):
         """Sets the current_owner to the user's organization"""
-        user = self.request.user
-        if not hasattr(user, 'organization') or not user.organization:
+        unit = serializer.save(current_owner_id=self.get_organization_id())
+        record_events(unit.current_owner_id, [
+            {'unit_id': unit.id, 'event_type': CustodyEventType.CREATED}
+        ])
+
+    def get_etag(self, response, digest):
+        if self.action == 'retrieve':
+            return unit_etag(
+                self.unit_version, self.request.query_params.get('fields')
+            )
+        return super().get_etag(response, digest)
+
+    def get_object(self):
+        unit = super().get_object()
+        self.unit_version = unit.version
+        return unit
+
+    def get_expected_version(self, unit):
+        """Returns the version the client based its write on.
+
+        That is the `If-Match` ETag when sent (`*` matches any version, and
+        the ETag of a sparse fieldset names the version it was read at),
+        otherwise the version this request read.
+        """
+        if_match = self.request.headers.get('If-Match', '').strip()
+        if not if_match or if_match == '*':
+            return unit.version
+        versions = {
+            etag.strip().strip('"').partition('-')[0] for etag in if_match.split(',')
+        }
+        if str(unit.version) not in versions:
+            raise PreconditionFailed()
+        return unit.version
+
+    def update(self, request, *args, **kwargs):
+        response = super().update(request, *args, **kwargs)
+        response['ETag'] = unit_etag(self.unit_version)
+        return response
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        """Writes only the changed columns, conditional on the version.
+
+        A single `UPDATE ... WHERE version = ?` replaces the full-row save,
+        so a concurrent write makes it match no row and answers 412
+        instead of being overwritten; no row lock is taken.
+        """
+        unit = serializer.instance
+        expected = self.get_expected_version(unit)
+        before = {name: getattr(unit, name) for name in LEDGER_TRACKED_FIELDS}
+        location = (unit.gps_coordinates, unit.storage_location)
+        values = {}
+        for name, value in serializer.validated_data.items():
+            field = Unit._meta.get_field(name)
+            if field.is_relation:
+                value = value.pk if value is not None else None
+            if getattr(unit, field.attname) != value:
+                values[field.attname] = value
+                setattr(unit, field.attname, value)
+        if not values:
+            return
+        if (unit.gps_coordinates, unit.storage_location) != location:
+            unit.locate()
+            values.update(
+                latitude=unit.latitude, longitude=unit.longitude,
+                geohash=unit.geohash
+            )
+
+        unit.updated_at = timezone.now()
+        updated = self.get_queryset().filter(pk=unit.pk, version=expected).update(
+            **values, updated_at=unit.updated_at, version=F('version') + 1
+        )
+        if not updated:
+            raise PreconditionFailed()
+        unit.version = self.unit_version = expected + 1
+
+        changes = {
+            name: [old, getattr(unit, name)]
+            for name, old in before.items() if getattr(unit, name) != old
+        }
+        if changes:
+            record_events(unit.current_owner_id, [{
+                'unit_id': unit.id,
+                'event_type': CustodyEventType.STATUS,
+                'changes': changes,
+            }])
+        # After commit, so a concurrent read cannot cache the old row
+        # under the new version
+        transaction.on_commit(functools.partial(
+            bump_version, unit_scope(unit.current_owner_id)
+        ))
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        """Records the deletion in the ledger before removing the Unit.
+
+        Children are detached here rather than by the SET_NULL cascade,
+        which would leave their `updated_at` and `version` untouched and
+        hide the change from the sync feed and from If-Match.
+        """
+        record_events(instance.current_owner_id, [
+            {'unit_id': instance.id, 'event_type': CustodyEventType.DELETED}
+        ])
+        Unit.objects.filter(parent_unit=instance).update(
+            parent_unit=None, updated_at=timezone.now(), version=F('version') + 1
+        )
+        instance.delete()
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='bulk',
+        parser_classes=[JSONParser, NDJSONParser]
+    )
+    def bulk_create(self, request):
+        """Creates Units from a JSON array or NDJSON stream in batches.
+
+        Valid rows are inserted with one `bulk_create` per batch; invalid
+        rows are skipped and reported by their position in the input.
+        """
+        organization_id = self.get_organization_id()
+        rows = request.data
+        if not isinstance(rows, list | Iterator):
+            raise exceptions.ParseError(
+                "Expected a JSON array or an NDJSON stream of units."
+            )
+
+        validator = self.get_serializer()
+        created = 0
+        errors = []
+        numbered_rows = enumerate(rows)
+        while batch := list(islice(numbered_rows, self.bulk_batch_size)):
+            units = []
+            for index, row in batch:
+                try:
+                    if isinstance(row, exceptions.ParseError):
+                        raise row
+                    data = validator.run_validation(row)
+                except exceptions.APIException as exc:
+                    errors.append({'index': index, 'errors': exc.detail})
+                    continue
+                unit = Unit(**data, current_owner_id=organization_id)
+                unit.locate()
+                units.append(unit)
+            with transaction.atomic():
+                created += len(Unit.objects.bulk_create(units))
+                record_events(organization_id, [
+                    {'unit_id': unit.id, 'event_type': CustodyEventType.CREATED}
+                    for unit in units
+                ])
+
+        if created:
+            bump_version(unit_scope(organization_id))
+
+        if not errors:
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(
+            {'created': created, 'errors': errors},
+            status=response_status
+        )
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='lab-results',
+        parser_classes=[MultiPartParser]
+    )
+    def lab_results(self, request):
+        """Queues a lab result CSV for the background worker.
+
+        Answers 202 at once; the job's progress is at /api/jobs/<id>/.
+        """
+        organization_id = self.get_organization_id()
+        upload = LabResultUploadSerializer(data=request.data)
+        upload.is_valid(raise_exception=True)
+        job = Job.objects.create(
+            organization_id=organization_id,
+            created_by_id=request.user.pk,
+            kind=JobKind.LAB_RESULTS,
+            file=upload.validated_data['file'],
+        )
+        return job_accepted(request, job)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Streams the organization's Units as CSV or NDJSON.
+
+        `?output=csv|ndjson` picks the format (CSV by default); the list
+        filters and `fields=` apply as they do on the list endpoint.
+        """
+        output = request.query_params.get('output', 'csv')
+        if output not in EXPORTERS:
+            raise exceptions.ValidationError(
+                {'output': f"Must be one of: {', '.join(EXPORTERS)}."}
+            )
+        fields = UnitSerializer.Meta.fields
+        if requested := request.query_params.get('fields'):
+            wanted = {name.strip() for name in requested.split(',')}
+            fields = [name for name in fields if name in wanted]
+            if not fields:
+                raise exceptions.ValidationError(
+                    {'fields': "None of the requested fields exist."}
+                )
+
+        stream, content_type = EXPORTERS[output]
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            stream(queryset, fields), content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="units.{output}"'
+        )
+        return response
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """Aggregates weight and unit counts in the database.
+
+        `?group_by=cultivar_name,status` picks the grouping columns and
+        `?bucket=month` (day, week, month or year) adds a harvest date
+        bucket. The list filters narrow the units being summarised.
+        """
+        return self.cached_response(self.build_summary, request)
+
+    def build_summary(self, request):
+        group_by = [
+            name for name in request.query_params.get('group_by', '').split(',')
+            if name
+        ]
+        unknown = set(group_by) - set(self.summary_group_fields)
+        if unknown:
+            raise exceptions.ValidationError(
+                {'group_by': f"Cannot group by: {', '.join(sorted(unknown))}."}
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+
+        bucket = request.query_params.get('bucket')
+        if bucket is not None:
+            if bucket not in self.summary_buckets:
+                raise exceptions.ValidationError(
+                    {'bucket': f"Must be one of: {', '.join(self.summary_buckets)}."}
+                )
+            queryset = queryset.annotate(
+                harvest_period=self.summary_buckets[bucket]('date_harvested')
+            )
+            group_by.append('harvest_period')
+
+        totals = {'total_weight': Sum('weight'), 'unit_count': Count('id')}
+        if not group_by:
+            return Response({'results': [queryset.aggregate(**totals)]})
+        rows = (
+            queryset.order_by()
+            .values(*group_by)
+            .annotate(**totals)
+            .order_by(*group_by)
+        )
+        return Response({'results': list(rows)})
+
+    @action(detail=True, methods=['post'])
+    def transfer(self, request, pk=None):
+        """Hands a Unit over to another organization.
+
+        The transfer is written to both organizations' custody chains in
+        the same transaction that changes current_owner.
+        """
+        payload = UnitTransferSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        receiver = payload.validated_data['to_organization']
+
+        with transaction.atomic():
+            unit = get_object_or_404(
+                self.get_queryset().select_for_update(), pk=pk
+            )
+            sender_id = unit.current_owner_id
+            if receiver.pk == sender_id:
+                raise exceptions.ValidationError(
+                    {'to_organization': "Unit already belongs to it."}
+                )
+            # Lock both chains in a fixed order so opposite transfers
+            # between the same pair cannot deadlock
+            list(Organization.objects.select_for_update()
+                 .filter(pk__in=[sender_id, receiver.pk]).order_by('pk'))
+            unit.current_owner = receiver
+            unit.save(update_fields=['current_owner', 'updated_at'])
+            event = {
+                'unit_id': unit.id,
+                'event_type': CustodyEventType.TRANSFER,
+                'from_organization_id': sender_id,
+                'to_organization_id': receiver.pk,
+            }
+            record_events(sender_id, [event])
+            record_events(receiver.pk, [event])
+
+        bump_version(unit_scope(sender_id))
+        return Response(self.get_serializer(unit).data)
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """Returns what changed since `?cursor=` for offline clients.
+
+        `changes` holds the Units written since the cursor, oldest first,
+        seeked on the (current_owner, updated_at, id) index; `deleted`
+        lists Units deleted, archived or transferred away, read from the
+        custody ledger. Clients apply `deleted` then `changes`, store `cursor` and
+        call again at once while `has_more` is true. Without a cursor the
+        feed starts from the beginning with nothing deleted.
+        """
+        organization_id = self.get_organization_id()
+        cursor = request.query_params.get('cursor')
+        updated_at, unit_id, sequence = (
+            decode_sync_cursor(cursor) if cursor else (None, None, None)
+        )
+        page_size = self.paginator.get_page_size(request)
+
+        # Ledger appends hold the organization lock until commit, so
+        # sequences are gapless; updated_at is only trusted once any
+        # transaction that could still commit an earlier value has settled.
+        head = CustodyEvent.objects.for_organization(
+            organization_id
+        ).aggregate(head=Max('sequence'))['head'] or 0
+        settled = timezone.now() - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+
+        rows = ValuesRowSerializer(
+            self.get_serializer_class(), context=self.get_serializer_context()
+        )
+        extra = [name for name in ('id', 'updated_at') if name not in rows.fields]
+        queryset = self.get_queryset().filter(updated_at__lte=settled)
+        if updated_at:
+            # The redundant >= bound lets the index seek to the cursor
+            queryset = queryset.filter(
+                Q(updated_at__gte=updated_at),
+                Q(updated_at__gt=updated_at) | Q(id__gt=unit_id),
+            )
+        page = list(
+            queryset.order_by('updated_at', 'id')
+            .values(*rows.fields, *extra)[:page_size + 1]
+        )
+        has_more = len(page) > page_size
+        page = page[:page_size]
+        if page:
+            updated_at, unit_id = page[-1]['updated_at'], page[-1]['id']
+
+        deleted = []
+        if sequence is None:
+            sequence = head
+        else:
+            events = list(
+                CustodyEvent.objects.for_organization(organization_id)
+                .filter(
+                    sequence__gt=sequence,
+                    sequence__lte=head,
+                )
+                .filter(
+                    Q(event_type__in=[
+                        CustodyEventType.DELETED, CustodyEventType.ARCHIVED
+                    ])
+                    | Q(event_type=CustodyEventType.TRANSFER,
+                        from_organization_id=organization_id)
+                )
+                # Units that came back since are live, not deleted
+                .exclude(unit_id__in=self.get_queryset().values('id'))
+                .order_by('sequence')
+                .values_list('sequence', 'unit_id')[:page_size + 1]
+            )
+            if len(events) > page_size:
+                has_more = True
+                events = events[:page_size]
+                sequence = events[-1][0]
+            else:
+                sequence = head
+            deleted = list(dict.fromkeys(unit for _, unit in events))
+
+        return Response({
+            'changes': rows.to_representation(page, drop=extra),
+            'deleted': deleted,
+            'cursor': encode_sync_cursor(updated_at, unit_id, sequence),
+            'has_more': has_more,
+        })
+
+    @action(detail=False, methods=['post'])
+    def transition(self, request):
+        """Moves up to MAX_TRANSITION_UNITS Units to a new status.
+
+        Targets are chosen by `ids` in the body or by the list filters in
+        the query string (paging and `fields` parameters select nothing);
+        a filter matching more units is refused. Units
+        whose current status cannot move to the requested one are left
+        untouched and counted as skipped. The locked rows are updated and
+        written to the ledger `bulk_batch_size` ids at a time.
+        """
+        payload = UnitTransitionSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        data = payload.validated_data
+
+        queryset = self.get_queryset()
+        if 'ids' in data:
+            queryset = queryset.filter(id__in=data['ids'])
+        elif (
+            UnitFilterBackend.is_filtering(request.query_params)
+            or filters.SearchFilter().get_search_terms(request)
+        ):
+            # Paging or field parameters alone must not select every unit
+            queryset = self.filter_queryset(queryset)
+        else:
+            raise exceptions.ValidationError(
+                "Provide unit ids or a filter to select units."
+            )
+
+        changes = {'updated_at': timezone.now()}
+        if 'status' in data:
+            changes['status'] = data['status']
+            queryset = queryset.filter(status__in=allowed_sources(
+                UNIT_STATUS_TRANSITIONS, data['status']
+            ))
+        if 'lab_test_status' in data:
+            changes['lab_test_status'] = data['lab_test_status']
+            queryset = queryset.filter(lab_test_status__in=allowed_sources(
+                LAB_TEST_STATUS_TRANSITIONS, data['lab_test_status']
+            ))
+
+        with transaction.atomic():
+            matched = list(
+                queryset.select_for_update().order_by()
+                .values_list('id', *LEDGER_TRACKED_FIELDS)
+                [:MAX_TRANSITION_UNITS + 1]
+            )
+            if len(matched) > MAX_TRANSITION_UNITS:
+                raise exceptions.ValidationError(
+                    f"The filter matches more than {MAX_TRANSITION_UNITS} "
+                    "units; narrow it down."
+                )
+            updated = 0
+            rows = iter(matched)
+            while batch := list(islice(rows, self.bulk_batch_size)):
+                updated += self.get_queryset().filter(
+                    id__in=[row[0] for row in batch]
+                ).update(**changes, version=F('version') + 1)
+                record_events(request.user.organization_id, [
+                    {
+                        'unit_id': unit_id,
+                        'event_type': CustodyEventType.STATUS,
+                        'changes': {
+                            name: [old, changes[name]]
+                            for name, old in zip(
+                                LEDGER_TRACKED_FIELDS, values, strict=True
+                            )
+                            if name in changes
+                        },
+                    }
+                    for unit_id, *values in batch
+                ])
+        if updated:
+            bump_version(unit_scope(request.user.organization_id))
+        result = {'updated': updated}
+        if 'ids' in data:
+            result['skipped'] = len(set(data['ids'])) - updated
+        return Response(result)
+
+
+class ArchivedUnitViewSet(
+    OrganizationScopedMixin,
+    ValuesListMixin,
+    LineageMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
+    """ Read-only access to the organization's archived Units. """
+    model = ArchivedUnit
+    serializer_class = ArchivedUnitSerializer
+    permission_classes = [permissions.IsAuthenticated]  # noqa: RUF012
+    pagination_class = UnitCursorPagination
+    filter_backends = [UnitFilterBackend, filters.SearchFilter]  # noqa: RUF012
+    search_fields = ['cultivar_name', 'storage_location']  # noqa: RUF012
+
+
+class CustodyEventViewSet(OrganizationScopedMixin, viewsets.ReadOnlyModelViewSet):
+    """ Read-only access to the organization's custody ledger. """
+    model = CustodyEvent
+    serializer_class = CustodyEventSerializer
+    permission_classes = [permissions.IsAuthenticated]  # noqa: RUF012
+    pagination_class = CustodyEventCursorPagination
+
+    def get_queryset(self):
+        """Filters the ledger to the user's organization, optionally by unit"""
+        queryset = super().get_queryset()
+        if unit_id := self.request.query_params.get('unit'):
+            try:
+                queryset = queryset.filter(unit_id=uuid.UUID(unit_id))
+            except ValueError as exc:
+                raise exceptions.ValidationError(
+                    {'unit': "Must be a valid UUID."}
+                ) from exc
+        return queryset
+
+    @action(detail=False, methods=['post'])
+    def verify(self, request):
+        """Verifies the chain since the last checkpoint (or fully with ?full=1)"""
+        organization_id = self.get_tenant_id()
+        if not organization_id:
             raise exceptions.PermissionDenied(
-                "User must belong to an Organization to create units."
+                "User must belong to an Organization to verify its ledger."
+            )
+        full = request.query_params.get('full') in ('1', 'true')
+        if request.query_params.get('background') in ('1', 'true'):
+            job = Job.objects.create(
+                organization_id=organization_id,
+                created_by_id=request.user.pk,
+                kind=JobKind.VERIFY_LEDGER,
+                params={'full': full},
             )
-        serializer.save(current_owner=user.organization)
\ No newline at end of file
+            return job_accepted(request, job)
+        return Response(verify_chain(organization_id, full=full))
+
+
+class JobViewSet(OrganizationScopedMixin, viewsets.ReadOnlyModelViewSet):
+    """ Status of the organization's background jobs. """
+    model = Job
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAuthenticated]  # noqa: RUF012
+    pagination_class = JobCursorPagination
+
+
+class TokenRevokeView(APIView):
+    """ Revokes the caller's access token and, if given, their refresh token """
+    permission_classes = [permissions.IsAuthenticated]  # noqa: RUF012
+
+    def post(self, request):
+        refresh = None
+        if raw := request.data.get('refresh'):
+            try:
+                refresh = RefreshToken(raw)
+            except TokenError as exc:
+                raise InvalidToken(exc.args[0]) from exc
+            claim = jwt_settings.USER_ID_CLAIM
+            if str(refresh.get(claim)) != str(request.auth.get(claim)):
+                raise exceptions.PermissionDenied(
+                    "The refresh token belongs to another user."
+                )
+        with transaction.atomic():
+            revoke_token(request.auth)
+            if refresh is not None:
+                revoke_token(refresh)
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -2,6 +2,7 @@
 Django settings for solv_project project.
 """
 
+import os
 from datetime import timedelta
 from pathlib import Path
 
@@ -30,10 +31,10 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework_simplejwt',
     'inventory',
-    'users',
 ]
 
 MIDDLEWARE = [
+    'inventory.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -62,13 +63,19 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'solv_project.wsgi.application'
 
+AUTH_USER_MODEL = 'inventory.User'
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'inventory.authentication.OrganizationJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated', # Lock everything by default
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'inventory.renderers.ORJSONRenderer', # stdlib json when orjson is absent
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
 # Configure the Token behavior
@@ -78,18 +85,140 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_OBTAIN_SERIALIZER': 'inventory.serializers.OrganizationTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'inventory.serializers.OrganizationTokenRefreshSerializer',
 }
 
+# Authorize requests from the token's organization/role claims instead of
+# loading the user row. Revocation answers are cached per process for
+# TOKEN_REVOCATION_CACHE_TTL seconds, which bounds how long a revoked token
+# may still be accepted elsewhere.
+INVENTORY_STATELESS_AUTH = os.environ.get(
+    'INVENTORY_STATELESS_AUTH', 'true'
+).lower() in ('1', 'true', 'yes')
+TOKEN_REVOCATION_CACHE_TTL = float(os.environ.get('TOKEN_REVOCATION_CACHE_TTL', '30'))
+TOKEN_REVOCATION_CACHE_SIZE = int(os.environ.get('TOKEN_REVOCATION_CACHE_SIZE', '10000'))
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# DB_ENGINE=postgresql selects the production profile; anything else runs
+# on the local SQLite file in WAL mode so readers don't block the writer.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'solv_trustlayer'),
+            'USER': os.environ.get('DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # Abort runaway queries instead of letting them pin a worker
+                'options': '-c statement_timeout={}'.format(
+                    os.environ.get('DB_STATEMENT_TIMEOUT_MS', '5000')
+                ),
+            },
+        }
+    }
+    if os.environ.get('DB_POOL', '').lower() in ('1', 'true', 'yes'):
+        # psycopg 3 connection pool; replaces persistent connections
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', '10')),
+        }
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+    else:
+        DATABASES['default']['CONN_MAX_AGE'] = int(
+            os.environ.get('DB_CONN_MAX_AGE', '600')
+        )
+    if os.environ.get('DB_REPLICA_HOST'):
+        # A streaming replica of the primary for tenant reads
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'HOST': os.environ['DB_REPLICA_HOST'],
+            'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+            'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+            'TEST': {'MIRROR': 'default'},
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                ),
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': int(os.environ.get('DB_BUSY_TIMEOUT', '20')),
+            },
+        }
+    }
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# With a replica, organization scoped reads of GET requests are served by it.
+# An organization that wrote in the last DB_REPLICA_LAG_SECONDS reads from
+# the primary instead, so nobody reads data older than their own writes.
+INVENTORY_READ_REPLICA = 'replica' in DATABASES
+DB_REPLICA_LAG_SECONDS = float(os.environ.get('DB_REPLICA_LAG_SECONDS', '5'))
+if INVENTORY_READ_REPLICA:
+    DATABASE_ROUTERS = ['inventory.routers.TenantReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Local memory by default; set CACHE_URL (e.g. redis://localhost:6379/0) to
+# share cached responses between worker processes.
+
+if os.environ.get('CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['CACHE_URL'],
+        }
     }
-}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'solv-trustlayer',
+        }
+    }
+
+# Seconds a cached unit/organization read is kept before recomputation
+INVENTORY_CACHE_TIMEOUT = int(os.environ.get('INVENTORY_CACHE_TIMEOUT', '300'))
+
+
+# Instrumentation
+# Queries slower than this are logged to `inventory.slow_queries`; when
+# METRICS_TOKEN is set, /metrics requires it as a bearer token.
+
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', '200'))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+
+# Background jobs
+# Rows applied per transaction by `run_jobs`, and how long a RUNNING job
+# may go without a heartbeat before another worker takes it over.
+
+JOB_CHUNK_SIZE = int(os.environ.get('JOB_CHUNK_SIZE', '1000'))
+JOB_STALE_SECONDS = int(os.environ.get('JOB_STALE_SECONDS', '300'))
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', '3'))
+
+# The unit changes feed only returns rows updated at least this many seconds
+# ago, so a slow transaction cannot commit behind a client's sync cursor.
+SYNC_SETTLE_SECONDS = float(os.environ.get('SYNC_SETTLE_SECONDS', '5'))
+
+# `archive_units` moves ARCHIVED and DISPOSED units not written for this many
+# days into the archive table, this many units per transaction.
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', '90'))
+ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', '1000'))
 
 
 # Password validation
@@ -128,6 +257,9 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded job input files; workers must see the same directory
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', BASE_DIR / 'media')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -8,10 +8,16 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 
+from inventory.instrumentation import metrics_view
+from inventory.views import TokenRevokeView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('inventory.urls')),
 
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/revoke/', TokenRevokeView.as_view(), name='token_revoke'),
+
+    path('metrics', metrics_view, name='metrics'),
 ]
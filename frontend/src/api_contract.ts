@@ -18,6 +18,9 @@ export interface Unit {
     lab_test_status: LabTestStatus;
     date_harvested: string;
     gps_coordinates: string;
+    latitude: number | null;
+    longitude: number | null;
+    version: number;
     quality_grade: QualityGrade;
     storage_location: string;
     description: string;
@@ -46,4 +49,38 @@ export interface Organization {
  * The input data for creating a new unit.
  * @interface UnitInput
  */
-export interface UnitInput extends Omit<Unit, 'id' | 'created_at'> {}
\ No newline at end of file
+export interface UnitInput extends Omit<Unit, 'id' | 'created_at' | 'latitude' | 'longitude' | 'version'> {}
+
+/**
+ * Defines the envelope returned by cursor-paginated list endpoints.
+ * @interface CursorPage
+ */
+export interface CursorPage<T> {
+    next: string | null;
+    previous: string | null;
+    results: T[];
+}
+
+/**
+ * @interface UnitChanges
+ * A page of the delta sync feed (GET /api/units/changes/). Apply `deleted`
+ * before `changes`, keep `cursor` for the next call, and call again at once
+ * while `has_more` is true.
+ */
+export interface UnitChanges {
+    changes: Unit[];
+    deleted: string[];
+    cursor: string;
+    has_more: boolean;
+}
+
+/**
+ * @interface ArchivedUnit
+ * A closed unit moved out of the live inventory by `archive_units`
+ * (GET /api/archived-units/). Lineage results carry `archived_at` too,
+ * null for live units.
+ */
+export interface ArchivedUnit extends Unit {
+    updated_at: string;
+    archived_at: string;
+}
@@ -2,7 +2,7 @@
  * Client Service for the SOLV TrustLayer API.
  * @module client_service The module for the client service.
  */
-import { Unit, UnitInput } from './api_contract';
+import { CursorPage, Unit, UnitInput } from './api_contract';
 
 export const TEMP_OWNER_ID = '123-456-789';
 
@@ -161,7 +161,11 @@ const fetchApi = async <T>(
         ...options.headers,
     };
 
-    const response = await fetch(`${API_BASE_URL}${endpoint}`, {
+    // Pagination links from the API are already absolute URLs
+    const url = /^https?:\/\//.test(endpoint)
+        ? endpoint
+        : `${API_BASE_URL}${endpoint}`;
+    const response = await fetch(url, {
         ...options,
         headers,
     });
@@ -192,11 +196,19 @@ export const deleteUnit = async (unitId: number): Promise<void> => {
 };
 
 /**
- * Retrieves all Units from the API. (GET /api/units/)
+ * Retrieves every Unit from the API, following the cursor `next` links
+ * until the last page. (GET /api/units/)
  * @returns A Promise that resolves to an array of Units.
  */
 export const getUnits = async (): Promise<Unit[]> => {
-    return fetchApi<Unit[]>('/units');
+    const units: Unit[] = [];
+    let next: string | null = '/units/?page_size=1000';
+    while (next) {
+        const page: CursorPage<Unit> = await fetchApi<CursorPage<Unit>>(next);
+        units.push(...page.results);
+        next = page.next;
+    }
+    return units;
 };
 
 // --- Authentication Service ---